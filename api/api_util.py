@@ -2,6 +2,9 @@ import os
 import random
 import stat
 
+from django.core.cache import cache
+from django.db.models import Q
+
 from api.models import (
     LongRunningJob,
     Photo,
@@ -20,9 +23,15 @@ def get_current_job():
     return job_detail
 
 
-def shuffle(list):
-    random.shuffle(list)
-    return list
+def shuffled_join(*terms):
+    terms = [*terms]
+    random.shuffle(terms)
+    return " ".join(terms)
+
+
+# st_file_attributes only exists on Windows; everywhere else the hidden
+# attribute check would just burn a stat() before failing.
+_HAS_FILE_ATTRIBUTES = hasattr(os.stat_result, "st_file_attributes")
 
 
 def is_hidden(filepath):
@@ -31,29 +40,60 @@ def is_hidden(filepath):
 
 
 def has_hidden_attribute(filepath):
+    if not _HAS_FILE_ATTRIBUTES:
+        return False
     try:
         return bool(os.stat(filepath).st_file_attributes & stat.FILE_ATTRIBUTE_HIDDEN)
     except Exception:
         return False
 
 
+def is_hidden_entry(entry):
+    if entry.name.startswith("."):
+        return True
+    if not _HAS_FILE_ATTRIBUTES:
+        return False
+    try:
+        return bool(entry.stat().st_file_attributes & stat.FILE_ATTRIBUTE_HIDDEN)
+    except Exception:
+        return False
+
+
 def path_to_dict(path, recurse=2):
-    d = {"title": os.path.basename(path), "absolute_path": path}
-    if recurse > 0:
-        d["children"] = [
-            path_to_dict(os.path.join(path, x), recurse - 1)
-            for x in os.scandir(path)
-            if os.path.isdir(os.path.join(path, x))
-            and not is_hidden(os.path.join(path, x))
-        ]
-    else:
-        d["children"] = []
-    # sort children by title alphabetically (case insensitive)
-    d["children"] = sorted(d["children"], key=lambda k: k["title"].lower())
-    return d
+    root = {"title": os.path.basename(path), "absolute_path": path, "children": []}
+    stack = [(root, path, recurse)]
+    while stack:
+        node, node_path, depth = stack.pop()
+        if depth <= 0:
+            continue
+        children = node["children"]
+        for entry in os.scandir(node_path):
+            if entry.is_dir(follow_symlinks=False) and not is_hidden_entry(entry):
+                child = {
+                    "title": entry.name,
+                    "absolute_path": entry.path,
+                    "children": [],
+                }
+                children.append(child)
+                stack.append((child, entry.path, depth - 1))
+        # sort children by title alphabetically (case insensitive)
+        children.sort(key=lambda k: k["title"].lower())
+    return root
+
+
+SEARCH_TERM_EXAMPLES_CACHE_TTL = 60 * 60
+
+
+def get_search_term_examples_cache_key(user_id):
+    return f"search_term_examples:{user_id}"
 
 
 def get_search_term_examples(user):
+    cache_key = get_search_term_examples_cache_key(user.id)
+    cached_search_terms = cache.get(cache_key)
+    if cached_search_terms is not None:
+        return cached_search_terms
+
     default_search_terms = [
         "for people",
         "for places",
@@ -62,29 +102,25 @@ def get_search_term_examples(user):
         "for file path or file name",
     ]
 
-    possible_ids = list(
+    captioned_photos = (
         Photo.objects.filter(owner=user)
-        .exclude(caption_instance__captions_json={})
-        .exclude(caption_instance__captions_json__isnull=True)[:1000]
-        .values_list("image_hash", flat=True)
+        .exclude(
+            Q(caption_instance__captions_json={})
+            | Q(caption_instance__captions_json__isnull=True)
+        )
+        .prefetch_related("faces__person")
+        .select_related("caption_instance")
     )
-    if len(possible_ids) > 99:
-        possible_ids = random.choices(possible_ids, k=100)
-    logger.info(f"{len(possible_ids)} possible ids")
+
     try:
-        samples = (
-            Photo.objects.filter(owner=user)
-            .exclude(caption_instance__captions_json={})
-            .exclude(caption_instance__captions_json__isnull=True)
-            .filter(image_hash__in=possible_ids)
-            .prefetch_related("faces")
-            .prefetch_related("faces__person")
-            .prefetch_related("caption_instance")
-            .all()
-        )
+        # order_by("?") samples without replacement, so no photo is drawn twice
+        samples = list(captioned_photos.order_by("?")[:100])
     except ValueError:
         return default_search_terms
 
+    if not samples:
+        return default_search_terms
+
     search_data = []
     search_terms = default_search_terms
     logger.info("Getting search terms for user %s", user.id)
@@ -92,21 +128,17 @@ def get_search_term_examples(user):
     for p in samples:
         faces = p.faces.all()
         terms_loc = ""
-        if (
-            p.geolocation_json
-            and p.geolocation_json != {}
-            and "features" in p.geolocation_json
-        ):
+        if p.geolocation_json:
             terms_loc = [
                 f["text"]
-                for f in p.geolocation_json["features"][-5:]
-                if "text" in f and not f["text"].isdigit()
+                for f in p.geolocation_json.get("features", ())[-5:]
+                if isinstance(f.get("text"), str) and not f["text"].isdigit()
             ]
         terms_time = ""
         if p.exif_timestamp:
             terms_time = [str(p.exif_timestamp.year)]
         terms_people = []
-        if p.faces.count() > 0:
+        if faces:
             terms_people = [
                 f.person.name.split(" ")[0] if f.person else "" for f in faces
             ]
@@ -126,6 +158,8 @@ def get_search_term_examples(user):
         }
 
         search_data.append(terms)
+
+    if search_data:
         search_terms = []
         for datum in search_data:
             term_time = ""
@@ -145,34 +179,36 @@ def get_search_term_examples(user):
                 term_people = random.choice(datum["people"])
                 search_terms.append(term_people)
 
-            search_term_loc_people = " ".join(shuffle([term_loc, term_people]))
+            search_term_loc_people = shuffled_join(term_loc, term_people)
             if random.random() > 0.3:
                 search_terms.append(search_term_loc_people)
 
-            search_term_time_people = " ".join(shuffle([term_time, term_people]))
+            search_term_time_people = shuffled_join(term_time, term_people)
             if random.random() > 0.3:
                 search_terms.append(search_term_time_people)
 
-            search_term_people_thing = " ".join(shuffle([term_people, term_thing]))
+            search_term_people_thing = shuffled_join(term_people, term_thing)
             if random.random() > 0.9:
                 search_terms.append(search_term_people_thing)
 
-            search_term_all = " ".join(
-                shuffle([term_loc, term_people, term_time, term_thing])
+            search_term_all = shuffled_join(
+                term_loc, term_people, term_time, term_thing
             )
             if random.random() > 0.95:
                 search_terms.append(search_term_all)
 
-            search_term_loc_time = " ".join(shuffle([term_loc, term_time]))
+            search_term_loc_time = shuffled_join(term_loc, term_time)
             if random.random() > 0.3:
                 search_terms.append(search_term_loc_time)
 
-            search_term_loc_thing = " ".join(shuffle([term_loc, term_thing]))
+            search_term_loc_thing = shuffled_join(term_loc, term_thing)
             if random.random() > 0.9:
                 search_terms.append(search_term_loc_thing)
 
-            search_term_time_thing = " ".join(shuffle([term_time, term_thing]))
+            search_term_time_thing = shuffled_join(term_time, term_thing)
             if random.random() > 0.9:
                 search_terms.append(search_term_time_thing)
 
-    return list(filter(lambda x: len(x), set([x.strip() for x in search_terms])))
+    search_terms = list({s for s in (t.strip() for t in search_terms) if s})
+    cache.set(cache_key, search_terms, SEARCH_TERM_EXAMPLES_CACHE_TTL)
+    return search_terms
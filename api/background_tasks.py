@@ -1,10 +1,35 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
 from tqdm import tqdm
-from django.db import models
+from django.db import close_old_connections, models
+from django.utils import timezone
 
 from api.models import Photo
+from api.models.album_thing import AlbumThing, get_album_thing
 from api.models.photo_caption import PhotoCaption
 from api.util import logger
 
+CAPTION_GENERATION_WORKERS = int(os.getenv("CAPTION_GENERATION_WORKERS", "4"))
+GEOLOCATION_WORKERS = int(os.getenv("GEOLOCATION_WORKERS", "16"))
+
+
+def _generate_captions_for_photo(photo):
+    """Caption one photo; returns the photo on success so it can be bulk-saved."""
+    try:
+        logger.info("generating captions for %s" % photo.main_file.path)
+        caption_instance, created = PhotoCaption.objects.get_or_create(photo=photo)
+        caption_instance.generate_tag_captions()
+        photo.last_modified = timezone.now()
+        return photo
+    except Exception:
+        logger.exception("could not generate captions for photo: %s", photo)
+        return None
+    finally:
+        close_old_connections()
+
 
 def generate_captions(overwrite=False):
     if overwrite:
@@ -15,12 +40,28 @@ def generate_captions(overwrite=False):
             models.Q(search_instance__isnull=True)
             | models.Q(search_instance__search_captions__isnull=True)
         )
-    logger.info("%d photos to be processed for caption generation" % photos.count())
-    for photo in photos:
-        logger.info("generating captions for %s" % photo.main_file.path)
-        caption_instance, created = PhotoCaption.objects.get_or_create(photo=photo)
-        caption_instance.generate_tag_captions()
-        photo.save()
+    photos = photos.select_related("main_file").only(
+        "id", "image_hash", "main_file__path", "owner", "last_modified"
+    )
+    batch = []
+    processed = 0
+    photo_iter = photos.iterator(chunk_size=2000)
+    with ThreadPoolExecutor(max_workers=CAPTION_GENERATION_WORKERS) as executor:
+        while True:
+            chunk = list(islice(photo_iter, 500))
+            if not chunk:
+                break
+            for photo in executor.map(_generate_captions_for_photo, chunk):
+                if photo is None:
+                    continue
+                batch.append(photo)
+                processed += 1
+                if len(batch) >= 500:
+                    Photo.objects.bulk_update(batch, ["last_modified"], batch_size=500)
+                    batch = []
+    if batch:
+        Photo.objects.bulk_update(batch, ["last_modified"], batch_size=500)
+    logger.info("%d photos processed for caption generation" % processed)
 
 
 def geolocate(overwrite=False):
@@ -28,17 +69,78 @@ def geolocate(overwrite=False):
         photos = Photo.objects.all()
     else:
         photos = Photo.objects.filter(geolocation_json={})
+    photos = photos.select_related("main_file").only(
+        "id",
+        "image_hash",
+        "main_file__path",
+        "owner",
+        "exif_gps_lat",
+        "exif_gps_lon",
+        "exif_timestamp",
+        "geolocation_json",
+    )
     logger.info("%d photos to be geolocated" % photos.count())
-    for photo in photos:
-        try:
-            logger.info("geolocating %s" % photo.main_file.path)
-            photo._geolocate()
-            photo._add_location_to_album_dates()
-        except Exception:
-            logger.exception("could not geolocate photo: %s", photo)
+    # Shared per-run memo so photos shot at the same spot reuse one lookup.
+    geocode_cache = {}
+    photo_iter = photos.iterator(chunk_size=2000)
+    with ThreadPoolExecutor(max_workers=GEOLOCATION_WORKERS) as executor:
+        while True:
+            chunk = list(islice(photo_iter, 500))
+            if not chunk:
+                break
+            for _ in executor.map(
+                partial(_geolocate_photo, geocode_cache=geocode_cache), chunk
+            ):
+                pass
+
+
+def _geolocate_photo(photo, geocode_cache):
+    try:
+        logger.info("geolocating %s" % photo.main_file.path)
+        photo._geolocate(geocode_cache=geocode_cache)
+        photo._add_location_to_album_dates()
+    except Exception:
+        logger.exception("could not geolocate photo: %s", photo)
+    finally:
+        close_old_connections()
 
 
 def add_photos_to_album_things():
-    photos = Photo.objects.all()
-    for photo in tqdm(photos):
-        photo._add_to_album_place()
+    photos = Photo.objects.select_related("caption_instance").only(
+        "id", "image_hash", "owner", "caption_instance__captions_json"
+    )
+    through = AlbumThing.photos.through
+    album_things = {}
+    pairs = []
+    for photo in tqdm(photos.iterator(chunk_size=2000), total=photos.count()):
+        if not (
+            hasattr(photo, "caption_instance")
+            and photo.caption_instance
+            and isinstance(photo.caption_instance.captions_json, dict)
+            and "places365" in photo.caption_instance.captions_json
+        ):
+            continue
+        places365 = photo.caption_instance.captions_json["places365"]
+        for thing_type, key in (
+            ("places365_attribute", "attributes"),
+            ("places365_category", "categories"),
+        ):
+            for title in places365.get(key, []):
+                cache_key = (title, thing_type, photo.owner_id)
+                album_thing = album_things.get(cache_key)
+                if album_thing is None:
+                    album_thing = get_album_thing(
+                        title=title, owner=photo.owner, thing_type=thing_type
+                    )
+                    album_things[cache_key] = album_thing
+                pairs.append(through(albumthing_id=album_thing.id, photo_id=photo.id))
+        if len(pairs) >= 1000:
+            through.objects.bulk_create(pairs, ignore_conflicts=True, batch_size=1000)
+            pairs = []
+    if pairs:
+        through.objects.bulk_create(pairs, ignore_conflicts=True, batch_size=1000)
+    # bulk_create skips the m2m_changed signal, so refresh counters ourselves
+    for album_thing in album_things.values():
+        album_thing.photo_count = album_thing.photos.filter(hidden=False).count()
+        album_thing.save(update_fields=["photo_count"])
+        album_thing.update_default_cover_photo()
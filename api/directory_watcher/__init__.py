@@ -56,6 +56,7 @@ from api.directory_watcher.repair_jobs import (
 # Utilities
 from api.directory_watcher.utils import (
     is_hidden,
+    iter_files,
     should_skip,
     walk_directory,
     walk_files,
@@ -94,6 +95,7 @@ __all__ = [
     "repair_ungrouped_file_variants",
     # Utilities
     "is_hidden",
+    "iter_files",
     "should_skip",
     "walk_directory",
     "walk_files",
@@ -5,12 +5,15 @@ This module contains functions for creating File records and grouping
 them into Photo objects.
 """
 
-import datetime
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-import pytz
 from django.conf import settings
+from django.db import close_old_connections
 from django.db.models import Q
+from django.utils import timezone
 
 from api import util
 from api.models import File, Photo, Thumbnail
@@ -27,6 +30,12 @@ from api.directory_watcher.file_grouping import (
 )
 from api.directory_watcher.utils import update_scan_counter
 
+# Hashing and media validation are I/O bound; half the cores keeps rotating
+# media from thrashing while still overlapping reads on SSDs.
+SCAN_CONCURRENCY = int(
+    os.getenv("SCAN_CONCURRENCY", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+
 
 def create_file_record(user, path) -> File | None:
     """
@@ -118,22 +127,18 @@ def group_files_into_photo(user, files: list[File], job_id) -> Photo | None:
         
         return existing_photo
     
-    # Create new Photo
-    photo = Photo()
-    photo.image_hash = main_file.hash
-    photo.owner = user
-    photo.added_on = datetime.datetime.now().replace(tzinfo=pytz.utc)
-    photo.geolocation_json = {}
-    photo.video = (main_file.type == File.VIDEO)
-    photo.save()
-    
-    # Add all files to the photo
-    for f in files:
-        photo.files.add(f)
-    
-    photo.main_file = main_file
-    photo.save()
-    
+    # Create new Photo with main_file set up front, then attach all the
+    # variants in one through-table insert instead of save/add/save
+    photo = Photo.objects.create(
+        image_hash=main_file.hash,
+        owner=user,
+        added_on=timezone.now(),
+        geolocation_json={},
+        video=(main_file.type == File.VIDEO),
+        main_file=main_file,
+    )
+    photo.files.add(*files)
+
     # Handle embedded media (Google/Samsung Live Photos with embedded video)
     if has_embedded_motion_video(main_file.path) and settings.FEATURE_PROCESS_EMBEDDED_MEDIA:
         em_path = extract_embedded_motion_video(main_file.path, main_file.hash)
@@ -141,8 +146,7 @@ def group_files_into_photo(user, files: list[File], job_id) -> Photo | None:
             em_file = File.create(em_path, user)
             main_file.embedded_media.add(em_file)
             photo.files.add(em_file)
-            photo.save()
-    
+
     util.logger.info(f"job {job_id}: Created Photo {photo.image_hash} with {len(files)} file(s)")
     return photo
 
@@ -179,16 +183,22 @@ def create_new_image(user, path) -> Photo | None:
     if is_metadata(path):
         photo_name = os.path.splitext(os.path.basename(path))[0]
         photo_dir = os.path.dirname(path)
-        photo = Photo.objects.filter(
-            Q(files__path__contains=photo_dir)
-            & Q(files__path__contains=photo_name)
-            & ~Q(files__path__contains=os.path.basename(path))
-        ).first()
+        # Anchored match on "<dir>/<stem>.<ext>" (plus the bare stem, for
+        # double-extension sidecars like IMG_001.jpg.xmp) so the planner can
+        # use the File.path index instead of three wildcard LIKE scans.
+        stem_path = os.path.join(photo_dir, photo_name)
+        photo = (
+            Photo.objects.filter(
+                Q(files__path__startswith=stem_path + ".")
+                | Q(files__path=stem_path)
+            )
+            .exclude(files__path=path)
+            .first()
+        )
 
         if photo:
             file = File.create(path, user)
             photo.files.add(file)
-            photo.save()
         else:
             util.logger.warning(f"no photo to metadata file found {path}")
         return None
@@ -203,7 +213,6 @@ def create_new_image(user, path) -> Photo | None:
             if not existing_photo.files.filter(path=path).exists():
                 raw_file = File.create(path, user)
                 existing_photo.files.add(raw_file)
-                existing_photo.save()
                 util.logger.info(f"Attached RAW file {path} to existing Photo {existing_photo.image_hash}")
             return existing_photo
     
@@ -216,20 +225,24 @@ def create_new_image(user, path) -> Photo | None:
                 video_file = File.create(path, user)
                 existing_photo.files.add(video_file)
                 existing_photo.video = False  # Keep photo as image (video is just a variant)
-                existing_photo.save()
+                existing_photo.save(update_fields=["video"])
                 util.logger.info(f"Attached Live Photo video {path} to existing Photo {existing_photo.image_hash}")
             return existing_photo
 
     # === Standard Photo Creation ===
-    photo = Photo()
-    photo.image_hash = hash_value
-    photo.owner = user
-    photo.added_on = datetime.datetime.now().replace(tzinfo=pytz.utc)
-    photo.geolocation_json = {}
-    photo.video = is_video(path)
-    photo.save()
+    # Create the File first so main_file can be set in the initial INSERT,
+    # avoiding the save/add/save double-write per new photo
     file = File.create(path, user)
-    
+    photo = Photo.objects.create(
+        image_hash=hash_value,
+        owner=user,
+        added_on=timezone.now(),
+        geolocation_json={},
+        video=is_video(path),
+        main_file=file,
+    )
+    photo.files.add(file)
+
     # Live Photo detection - extracts embedded motion video if present (Google/Samsung)
     if has_embedded_motion_video(file.path) and settings.FEATURE_PROCESS_EMBEDDED_MEDIA:
         em_path = extract_embedded_motion_video(file.path, file.hash)
@@ -238,10 +251,7 @@ def create_new_image(user, path) -> Photo | None:
             file.embedded_media.add(em_file)
             # Also add embedded video to Photo.files as a variant
             photo.files.add(em_file)
-    
-    photo.files.add(file)
-    photo.main_file = file
-    photo.save()
+
     return photo
 
 
@@ -259,11 +269,15 @@ def handle_new_image(user, path, job_id, photo=None):
         This function is used when uploading a picture, because rescanning does not perform machine learning tasks.
     """
     try:
-        start = datetime.datetime.now()
+        start = time.monotonic()
         if photo is None:
             photo = create_new_image(user, path)
-            elapsed = (datetime.datetime.now() - start).total_seconds()
-            util.logger.info(f"job {job_id}: save image: {path}, elapsed: {elapsed}")
+            util.logger.info(
+                "job %s: save image: %s, elapsed: %.3f",
+                job_id,
+                path,
+                time.monotonic() - start,
+            )
         if photo:
             _process_photo(photo, path, job_id, start)
 
@@ -278,6 +292,14 @@ def handle_new_image(user, path, job_id, photo=None):
         update_scan_counter(job_id)
 
 
+def _create_file_record_worker(user, path):
+    """create_file_record wrapper for pool threads; tidies their connections."""
+    try:
+        return create_file_record(user, path)
+    finally:
+        close_old_connections()
+
+
 def handle_file_group(user, file_paths: list[str], job_id):
     """
     Phase 2 handler: Process a group of related files into a single Photo.
@@ -291,15 +313,24 @@ def handle_file_group(user, file_paths: list[str], job_id):
         job_id: Job ID for logging and progress tracking
     """
     try:
-        start = datetime.datetime.now()
-        
-        # Get or create File records for all paths
+        start = time.monotonic()
+
+        # Get or create File records for all paths. Hashing+validation of the
+        # variants in a group is independent, so overlap their disk reads.
         files = []
-        for path in file_paths:
-            file = create_file_record(user, path)
-            if file:
-                files.append(file)
-        
+        if len(file_paths) > 1 and SCAN_CONCURRENCY > 1:
+            workers = min(SCAN_CONCURRENCY, len(file_paths))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(
+                    partial(_create_file_record_worker, user), file_paths
+                )
+                files = [file for file in results if file]
+        else:
+            for path in file_paths:
+                file = create_file_record(user, path)
+                if file:
+                    files.append(file)
+
         if not files:
             util.logger.warning(f"job {job_id}: No valid files in group: {file_paths}")
             return
@@ -311,8 +342,12 @@ def handle_file_group(user, file_paths: list[str], job_id):
             util.logger.warning(f"job {job_id}: Could not create photo for files: {file_paths}")
             return
         
-        elapsed = (datetime.datetime.now() - start).total_seconds()
-        util.logger.info(f"job {job_id}: created photo with {len(files)} files, elapsed: {elapsed}")
+        util.logger.info(
+            "job %s: created photo with %d files, elapsed: %.3f",
+            job_id,
+            len(files),
+            time.monotonic() - start,
+        )
         
         # Process the photo (thumbnails, EXIF, etc.) using main_file
         if photo.main_file:
@@ -329,94 +364,135 @@ def handle_file_group(user, file_paths: list[str], job_id):
         update_scan_counter(job_id)
 
 
-def _process_photo(photo: Photo, path: str, job_id, start: datetime.datetime):
+def _log_step(job_id, step, path, step_start):
+    """Log one processing step's duration lazily; returns the next step's start."""
+    now = time.monotonic()
+    util.logger.info("job %s: %s: %s, elapsed: %.3f", job_id, step, path, now - step_start)
+    return now
+
+
+def _process_photo(photo: Photo, path: str, job_id, start: float):
     """
     Process a photo: generate thumbnails, extract EXIF, calculate hashes, etc.
-    
+
     This is the common processing logic shared between handle_new_image and handle_file_group.
-    
+
     Args:
         photo: The Photo object to process
         path: The main file path (for logging)
         job_id: Job ID for logging
         start: Start time for elapsed time calculation
     """
-    util.logger.info(f"job {job_id}: handling image {path}")
-    
+    util.logger.info("job %s: handling image %s", job_id, path)
+
     # Create or get thumbnail instance
     thumbnail, _ = Thumbnail.objects.get_or_create(photo=photo)
+    step_start = time.monotonic()
     try:
         thumbnail._generate_thumbnail()
-        elapsed = (datetime.datetime.now() - start).total_seconds()
-        util.logger.info(
-            f"job {job_id}: generate thumbnails: {path}, elapsed: {elapsed}"
-        )
+        step_start = _log_step(job_id, "generate thumbnails", path, step_start)
     except Exception as e:
-        util.logger.error(f"job {job_id}: Failed to generate thumbnail for {path}: {e}")
-    
-    # Calculate Aspect Ratio
-    try:
-        thumbnail._calculate_aspect_ratio()
-        elapsed = (datetime.datetime.now() - start).total_seconds()
-        util.logger.info(
-            f"job {job_id}: calculate aspect ratio: {path}, elapsed: {elapsed}"
+        util.logger.error(
+            "job %s: Failed to generate thumbnail for %s: %s", job_id, path, e
         )
-    except Exception as e:
-        util.logger.warning(f"job {job_id}: Failed to calculate aspect ratio for {path} (skipping): {e}")
-    
-    # Calculate perceptual hash for duplicate detection
-    try:
-        if thumbnail.thumbnail_big and os.path.exists(thumbnail.thumbnail_big.path):
-            phash = calculate_hash_from_thumbnail(thumbnail.thumbnail_big.path)
-            if phash:
-                photo.perceptual_hash = phash
-                photo.save(update_fields=["perceptual_hash"])
-                elapsed = (datetime.datetime.now() - start).total_seconds()
-                util.logger.info(
-                    f"job {job_id}: calculate perceptual hash: {path}, elapsed: {elapsed}"
+        step_start = time.monotonic()
+
+    # Once the thumbnail exists, the next three steps are independent:
+    # aspect ratio and dominant color read the generated thumbnail, the
+    # perceptual hash reads it too but only writes photo.perceptual_hash,
+    # and EXIF extraction reads the original file. Overlap them in a small
+    # pool, keeping each mutated object owned by a single thread (the
+    # thumbnail steps share one worker so they never save concurrently).
+    def _thumbnail_steps():
+        try:
+            step = time.monotonic()
+            try:
+                thumbnail._calculate_aspect_ratio()
+                step = _log_step(job_id, "calculate aspect ratio", path, step)
+            except Exception as e:
+                util.logger.warning(
+                    "job %s: Failed to calculate aspect ratio for %s (skipping): %s",
+                    job_id,
+                    path,
+                    e,
                 )
-    except Exception as e:
-        util.logger.error(f"job {job_id}: Failed to calculate perceptual hash for {path}: {e}")
-    
-    # Extract EXIF Data
-    try:
-        from api.models.photo_metadata import PhotoMetadata
-        PhotoMetadata.extract_exif_data(photo, commit=True)
-        elapsed = (datetime.datetime.now() - start).total_seconds()
-        util.logger.info(
-            f"job {job_id}: extract exif data: {path}, elapsed: {elapsed}"
-        )
-    except Exception as e:
-        util.logger.error(f"job {job_id}: Failed to extract EXIF for {path}: {e}")
+                step = time.monotonic()
+            try:
+                thumbnail._get_dominant_color()
+                _log_step(job_id, "get dominant color", path, step)
+            except Exception as e:
+                util.logger.warning(
+                    "job %s: Failed to get dominant color for %s: %s", job_id, path, e
+                )
+        finally:
+            close_old_connections()
+
+    def _perceptual_hash_step():
+        try:
+            step = time.monotonic()
+            if thumbnail.thumbnail_big and os.path.exists(thumbnail.thumbnail_big.path):
+                phash = calculate_hash_from_thumbnail(thumbnail.thumbnail_big.path)
+                if phash:
+                    photo.perceptual_hash = phash
+                    photo.save(update_fields=["perceptual_hash"])
+                    _log_step(job_id, "calculate perceptual hash", path, step)
+        except Exception as e:
+            util.logger.error(
+                "job %s: Failed to calculate perceptual hash for %s: %s",
+                job_id,
+                path,
+                e,
+            )
+        finally:
+            close_old_connections()
+
+    def _exif_step():
+        try:
+            step = time.monotonic()
+            from api.models.photo_metadata import PhotoMetadata
+
+            PhotoMetadata.extract_exif_data(photo, commit=True)
+            _log_step(job_id, "extract exif data", path, step)
+        except Exception as e:
+            util.logger.error(
+                "job %s: Failed to extract EXIF for %s: %s", job_id, path, e
+            )
+        finally:
+            close_old_connections()
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(step)
+            for step in (_thumbnail_steps, _perceptual_hash_step, _exif_step)
+        ]
+        for future in futures:
+            future.result()
+    step_start = time.monotonic()
 
-    # Extract Date/Time
+    # Extract Date/Time (needs the EXIF result, so it stays serial)
     try:
         photo._extract_date_time_from_exif(True)
-        elapsed = (datetime.datetime.now() - start).total_seconds()
-        util.logger.info(
-            f"job {job_id}: extract date time: {path}, elapsed: {elapsed}"
-        )
+        step_start = _log_step(job_id, "extract date time", path, step_start)
     except Exception as e:
-        util.logger.error(f"job {job_id}: Failed to extract date/time for {path}: {e}")
-    
-    # Dominant Color
-    try:
-        thumbnail._get_dominant_color()
-        elapsed = (datetime.datetime.now() - start).total_seconds()
-        util.logger.info(
-            f"job {job_id}: get dominant color: {path}, elapsed: {elapsed}"
+        util.logger.error(
+            "job %s: Failed to extract date/time for %s: %s", job_id, path, e
         )
-    except Exception as e:
-        util.logger.warning(f"job {job_id}: Failed to get dominant color for {path}: {e}")
-    
+        step_start = time.monotonic()
+
     # Search Captions
     try:
         search_instance, created = PhotoSearch.objects.get_or_create(photo=photo)
         search_instance.recreate_search_captions()
         search_instance.save()
-        elapsed = (datetime.datetime.now() - start).total_seconds()
-        util.logger.info(
-            f"job {job_id}: search caption recreated: {path}, elapsed: {elapsed}"
-        )
+        _log_step(job_id, "search caption recreated", path, step_start)
     except Exception as e:
-        util.logger.error(f"job {job_id}: Failed to recreate search captions for {path}: {e}")
\ No newline at end of file
+        util.logger.error(
+            "job %s: Failed to recreate search captions for %s: %s", job_id, path, e
+        )
+
+    util.logger.info(
+        "job %s: processed photo %s, total elapsed: %.3f",
+        job_id,
+        path,
+        time.monotonic() - start,
+    )
\ No newline at end of file
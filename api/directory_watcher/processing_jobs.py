@@ -11,13 +11,17 @@ from uuid import UUID
 
 from django import db
 from django.db.models import Q
-from django_q.tasks import AsyncTask
 
 from api import util
 from api.face_classify import cluster_all_faces
 from api.models import Face, LongRunningJob, Photo
 from api.models.photo_caption import PhotoCaption
-from api.directory_watcher.utils import update_scan_counter
+from api.directory_watcher.utils import (
+    ProgressThrottle,
+    bulk_enqueue,
+    get_last_finished_job,
+    update_scan_counter,
+)
 
 
 def generate_face_embeddings(user, job_id: UUID):
@@ -28,9 +32,10 @@ def generate_face_embeddings(user, job_id: UUID):
         user: The user whose faces to process
         job_id: Job ID for tracking progress
     """
-    if Face.objects.filter(encoding="").count() == 0:
+    # exists() short-circuits instead of a COUNT(*) over the whole table
+    if not Face.objects.filter(encoding="").exists():
         return
-    
+
     lrj = LongRunningJob.get_or_create_job(
         user=user,
         job_type=LongRunningJob.JOB_GENERATE_FACE_EMBEDDINGS,
@@ -39,21 +44,22 @@ def generate_face_embeddings(user, job_id: UUID):
 
     try:
         faces = Face.objects.filter(encoding="")
-        lrj.update_progress(current=0, target=faces.count())
+        face_count = faces.count()
+        lrj.update_progress(current=0, target=face_count)
         db.connections.close_all()
 
-        for face in faces:
-            failed = False
-            error = None
-            try:
-                face.generate_encoding()
-            except Exception as err:
-                util.logger.exception("An error occurred: ")
-                print(f"[ERR]: {err}")
-                failed = True
-                error_msg = f"Face {face.id}: {str(err)}\n{traceback.format_exc()}"
-                error = error_msg
-            update_scan_counter(job_id, failed, error)
+        with ProgressThrottle(job_id, face_count) as progress:
+            for face in faces.iterator(chunk_size=500):
+                try:
+                    face.generate_encoding()
+                except Exception as err:
+                    util.logger.exception("An error occurred: ")
+                    print(f"[ERR]: {err}")
+                    error = f"Face {face.id}: {str(err)}\n{traceback.format_exc()}"
+                    progress.flush()
+                    update_scan_counter(job_id, failed=True, error=error)
+                else:
+                    progress.tick()
 
         lrj.complete()
 
@@ -79,13 +85,7 @@ def generate_tags(user, job_id: UUID, full_scan=False):
     )
 
     try:
-        last_scan = (
-            LongRunningJob.objects.filter(finished=True)
-            .filter(job_type=LongRunningJob.JOB_GENERATE_TAGS)
-            .filter(started_by=user)
-            .order_by("-finished_at")
-            .first()
-        )
+        last_scan = get_last_finished_job(user, LongRunningJob.JOB_GENERATE_TAGS)
         from constance import config as site_config
 
         tagging_model = site_config.TAGGING_MODEL
@@ -101,15 +101,23 @@ def generate_tags(user, job_id: UUID, full_scan=False):
         if not full_scan and last_scan:
             existing_photos = existing_photos.filter(added_on__gt=last_scan.started_at)
 
-        if existing_photos.count() == 0:
+        photo_count = existing_photos.count()
+        if photo_count == 0:
             lrj.update_progress(current=0, target=0)
             lrj.complete()
             return
-        lrj.update_progress(current=0, target=existing_photos.count())
+        lrj.update_progress(current=0, target=photo_count)
         db.connections.close_all()
 
-        for photo in existing_photos:
-            AsyncTask(generate_tag_job, photo, job_id).run()
+        bulk_enqueue(
+            generate_tag_job,
+            (
+                (photo_id, job_id)
+                for photo_id in existing_photos.values_list(
+                    "pk", flat=True
+                ).iterator(chunk_size=2000)
+            ),
+        )
 
     except Exception as err:
         util.logger.exception("An error occurred: ")
@@ -117,25 +125,25 @@ def generate_tags(user, job_id: UUID, full_scan=False):
         lrj.fail(error=err)
 
 
-def generate_tag_job(photo: Photo, job_id: str):
+def generate_tag_job(photo_id: str, job_id: str):
     """
     Worker task to generate tags for a single photo.
-    
+
     Args:
-        photo: The photo to process
+        photo_id: Primary key of the photo to process
         job_id: Job ID for tracking progress
     """
     failed = False
     error = None
     try:
-        photo.refresh_from_db()
+        photo = Photo.objects.get(pk=photo_id)
         caption_instance, created = PhotoCaption.objects.get_or_create(photo=photo)
         caption_instance.generate_tag_captions(commit=True)
     except Exception as err:
-        util.logger.exception("An error occurred: %s", photo.image_hash)
+        util.logger.exception("An error occurred: %s", photo_id)
         print(f"[ERR]: {err}")
         failed = True
-        error_msg = f"Photo {photo.image_hash}: {str(err)}\n{traceback.format_exc()}"
+        error_msg = f"Photo {photo_id}: {str(err)}\n{traceback.format_exc()}"
         error = error_msg
     update_scan_counter(job_id, failed, error)
 
@@ -156,13 +164,7 @@ def generate_im2txt_captions(user, job_id: UUID, full_scan=False):
     )
 
     try:
-        last_scan = (
-            LongRunningJob.objects.filter(finished=True)
-            .filter(job_type=LongRunningJob.JOB_GENERATE_IM2TXT)
-            .filter(started_by=user)
-            .order_by("-finished_at")
-            .first()
-        )
+        last_scan = get_last_finished_job(user, LongRunningJob.JOB_GENERATE_IM2TXT)
         existing_photos = Photo.objects.filter(
             Q(owner=user.id)
             & (
@@ -175,15 +177,23 @@ def generate_im2txt_captions(user, job_id: UUID, full_scan=False):
         if not full_scan and last_scan:
             existing_photos = existing_photos.filter(added_on__gt=last_scan.started_at)
 
-        if existing_photos.count() == 0:
+        photo_count = existing_photos.count()
+        if photo_count == 0:
             lrj.update_progress(current=0, target=0)
             lrj.complete()
             return
-        lrj.update_progress(current=0, target=existing_photos.count())
+        lrj.update_progress(current=0, target=photo_count)
         db.connections.close_all()
 
-        for photo in existing_photos:
-            AsyncTask(generate_im2txt_job, photo, job_id).run()
+        bulk_enqueue(
+            generate_im2txt_job,
+            (
+                (photo_id, job_id)
+                for photo_id in existing_photos.values_list(
+                    "pk", flat=True
+                ).iterator(chunk_size=2000)
+            ),
+        )
 
     except Exception as err:
         util.logger.exception("An error occurred: ")
@@ -191,25 +201,25 @@ def generate_im2txt_captions(user, job_id: UUID, full_scan=False):
         lrj.fail(error=err)
 
 
-def generate_im2txt_job(photo: Photo, job_id: str):
+def generate_im2txt_job(photo_id: str, job_id: str):
     """
     Worker task to generate im2txt captions for a single photo.
 
     Args:
-        photo: The photo to process
+        photo_id: Primary key of the photo to process
         job_id: Job ID for tracking progress
     """
     failed = False
     error = None
     try:
-        photo.refresh_from_db()
+        photo = Photo.objects.get(pk=photo_id)
         caption_instance, created = PhotoCaption.objects.get_or_create(photo=photo)
         caption_instance.recreate_search_captions()
     except Exception as err:
-        util.logger.exception("An error occurred: %s", photo.image_hash)
+        util.logger.exception("An error occurred: %s", photo_id)
         print(f"[ERR]: {err}")
         failed = True
-        error_msg = f"Photo {photo.image_hash}: {str(err)}\n{traceback.format_exc()}"
+        error_msg = f"Photo {photo_id}: {str(err)}\n{traceback.format_exc()}"
         error = error_msg
     update_scan_counter(job_id, failed, error)
 
@@ -230,25 +240,27 @@ def add_geolocation(user, job_id: UUID, full_scan=False):
     )
 
     try:
-        last_scan = (
-            LongRunningJob.objects.filter(finished=True)
-            .filter(job_type=LongRunningJob.JOB_ADD_GEOLOCATION)
-            .filter(started_by=user)
-            .order_by("-finished_at")
-            .first()
-        )
+        last_scan = get_last_finished_job(user, LongRunningJob.JOB_ADD_GEOLOCATION)
         existing_photos = Photo.objects.filter(owner=user.id)
         if not full_scan and last_scan:
             existing_photos = existing_photos.filter(added_on__gt=last_scan.started_at)
-        if existing_photos.count() == 0:
+        photo_count = existing_photos.count()
+        if photo_count == 0:
             lrj.update_progress(current=0, target=0)
             lrj.complete()
             return
-        lrj.update_progress(current=0, target=existing_photos.count())
+        lrj.update_progress(current=0, target=photo_count)
         db.connections.close_all()
 
-        for photo in existing_photos:
-            AsyncTask(geolocation_job, photo, job_id).run()
+        bulk_enqueue(
+            geolocation_job,
+            (
+                (photo_id, job_id)
+                for photo_id in existing_photos.values_list(
+                    "pk", flat=True
+                ).iterator(chunk_size=2000)
+            ),
+        )
 
     except Exception as err:
         util.logger.exception("An error occurred: ")
@@ -256,24 +268,24 @@ def add_geolocation(user, job_id: UUID, full_scan=False):
         lrj.fail(error=err)
 
 
-def geolocation_job(photo: Photo, job_id: UUID):
+def geolocation_job(photo_id: str, job_id: UUID):
     """
     Worker task to add geolocation for a single photo.
-    
+
     Args:
-        photo: The photo to process
+        photo_id: Primary key of the photo to process
         job_id: Job ID for tracking progress
     """
     failed = False
     error = None
     try:
-        photo.refresh_from_db()
+        photo = Photo.objects.get(pk=photo_id)
         photo._geolocate()
         photo._add_location_to_album_dates()
     except Exception as err:
         util.logger.exception("An error occurred: ")
         failed = True
-        error_msg = f"Photo {photo.image_hash}: {str(err)}\n{traceback.format_exc()}"
+        error_msg = f"Photo {photo_id}: {str(err)}\n{traceback.format_exc()}"
         error = error_msg
     update_scan_counter(job_id, failed, error)
 
@@ -294,39 +306,40 @@ def scan_faces(user, job_id: UUID, full_scan=False):
     )
 
     try:
-        last_scan = (
-            LongRunningJob.objects.filter(finished=True)
-            .filter(job_type=LongRunningJob.JOB_SCAN_FACES)
-            .filter(started_by=user)
-            .order_by("-finished_at")
-            .first()
-        )
+        last_scan = get_last_finished_job(user, LongRunningJob.JOB_SCAN_FACES)
         existing_photos = Photo.objects.filter(
             Q(owner=user.id) & Q(thumbnail__thumbnail_big__isnull=False)
         )
         if not full_scan and last_scan:
             existing_photos = existing_photos.filter(added_on__gt=last_scan.started_at)
 
-        if existing_photos.count() == 0:
+        photo_count = existing_photos.count()
+        if photo_count == 0:
             lrj.update_progress(current=0, target=0)
             lrj.complete()
             return
 
-        lrj.update_progress(current=0, target=existing_photos.count())
+        lrj.update_progress(current=0, target=photo_count)
         db.connections.close_all()
 
-        for photo in existing_photos:
-            failed = False
-            error = None
-            try:
-                photo._extract_faces()
-            except Exception as err:
-                util.logger.exception("An error occurred: ")
-                print(f"[ERR]: {err}")
-                failed = True
-                error_msg = f"Photo {photo.image_hash}: {str(err)}\n{traceback.format_exc()}"
-                error = error_msg
-            update_scan_counter(job_id, failed, error)
+        # _extract_faces touches owner, main_file and thumbnail, so join those
+        # up front and stream the rows instead of hydrating every photo at once
+        face_scan_photos = existing_photos.select_related("main_file", "thumbnail")
+        with ProgressThrottle(job_id, photo_count) as progress:
+            for photo in face_scan_photos.iterator(chunk_size=1000):
+                try:
+                    photo._extract_faces()
+                except Exception as err:
+                    util.logger.exception("An error occurred: ")
+                    print(f"[ERR]: {err}")
+                    error = (
+                        f"Photo {photo.image_hash}: {str(err)}\n"
+                        f"{traceback.format_exc()}"
+                    )
+                    progress.flush()
+                    update_scan_counter(job_id, failed=True, error=error)
+                else:
+                    progress.tick()
     except Exception as err:
         util.logger.exception("An error occurred: ")
         print(f"[ERR]: {err}")
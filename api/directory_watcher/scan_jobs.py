@@ -14,7 +14,6 @@ from uuid import UUID
 import pytz
 from django import db
 from django.conf import settings
-from django.core.paginator import Paginator
 from django.db.models import F, Q
 from django.utils import timezone
 from django_q.tasks import AsyncTask, Chain
@@ -23,7 +22,7 @@ from api import util
 from api.metadata.reader import get_sidecar_files_in_priority_order
 from api.batch_jobs import batch_calculate_clip_embedding
 from api.models import LongRunningJob, Photo, Thumbnail
-from api.models.file import is_metadata
+from api.models.file import File, is_metadata
 
 from api.directory_watcher.file_grouping import get_file_grouping_key
 from api.directory_watcher.file_handlers import handle_new_image, handle_file_group
@@ -35,12 +34,30 @@ from api.directory_watcher.processing_jobs import (
 )
 from api.directory_watcher.repair_jobs import repair_ungrouped_file_variants
 from api.directory_watcher.utils import (
-    walk_directory,
+    bulk_enqueue,
+    get_last_finished_job,
+    iter_files,
     walk_files,
     update_scan_counter,
 )
 
 
+# Thumbnail directories already ensured by this process, so repeat scans
+# skip the stat/mkdir syscalls (keyed per path since MEDIA_ROOT can differ)
+_ensured_thumbnail_dirs: set[str] = set()
+
+
+def _ensure_thumbnail_dirs():
+    for directory in (
+        os.path.join(settings.MEDIA_ROOT, "square_thumbnails_small"),
+        os.path.join(settings.MEDIA_ROOT, "square_thumbnails"),
+        os.path.join(settings.MEDIA_ROOT, "thumbnails_big"),
+    ):
+        if directory not in _ensured_thumbnail_dirs:
+            os.makedirs(directory, exist_ok=True)
+            _ensured_thumbnail_dirs.add(directory)
+
+
 def _file_was_modified_after(filepath, time):
     """Check if a file was modified after a given time."""
     try:
@@ -63,12 +80,15 @@ def wait_for_group_and_process_metadata(
     **kwargs,  # Django-Q may pass additional arguments like 'schedule'
 ):
     """
-    Sentinel task: waits until the expected number of image/video tasks in the group complete,
-    then processes metadata files. It runs inside a django-q worker (non-blocking for the caller).
+    Sentinel task: waits until the expected number of image/video tasks in
+    the group complete, then processes metadata files. Only this tail polls -
+    the image groups themselves fan out across workers in parallel.
 
     Failure handling:
-    - If the group is not complete yet, it will re-enqueue itself up to `max_attempts`.
-    - After exhausting attempts, it proceeds with metadata processing anyway (best-effort).
+    - If the group is not complete yet, it will re-enqueue itself up to
+      `max_attempts`.
+    - After exhausting attempts, it proceeds with metadata processing anyway
+      (best-effort).
     """
     from django_q.tasks import count_group
     from django.contrib.auth import get_user_model
@@ -77,17 +97,13 @@ def wait_for_group_and_process_metadata(
         f"Sentinel attempt {attempt}/{max_attempts} for group {group_id} (expecting {expected_count} tasks)"
     )
 
-    # Check current completion count for the group
     try:
-        completed = count_group(group_id)  # counts successes by default
+        completed_int = int(count_group(group_id) or 0)
     except Exception as e:
         util.logger.warning(
             f"Could not read group status for {group_id}: {e}. Treating as incomplete."
         )
-        completed = 0
-
-    # Normalize to an int to avoid None-related type issues
-    completed_int = int(completed or 0)
+        completed_int = 0
 
     if completed_int < expected_count and attempt < max_attempts:
         util.logger.info(
@@ -108,10 +124,9 @@ def wait_for_group_and_process_metadata(
         ).run()
         return
 
-    # Proceed with metadata processing (either completed or after exhausting attempts)
     if completed_int < expected_count:
         util.logger.warning(
-            f"Proceeding with metadata despite incomplete image group {group_id}: {completed_int}/{expected_count}."
+            f"Processing metadata despite incomplete image group {group_id}: {completed_int}/{expected_count}."
         )
     else:
         util.logger.info(
@@ -131,13 +146,7 @@ def wait_for_group_and_process_metadata(
         )
         return
 
-    last_scan = (
-        LongRunningJob.objects.filter(finished=True)
-        .filter(job_type=LongRunningJob.JOB_SCAN_PHOTOS)
-        .filter(started_by=user)
-        .order_by("-finished_at")
-        .first()
-    )
+    last_scan = get_last_finished_job(user, LongRunningJob.JOB_SCAN_PHOTOS)
 
     for path in metadata_paths:
         try:
@@ -199,13 +208,7 @@ def scan_photos(
         scan_directory: Directory to scan (defaults to user's scan_directory)
         scan_files: Optional list of specific files to scan
     """
-    thumbnail_dirs = [
-        os.path.join(settings.MEDIA_ROOT, "square_thumbnails_small"),
-        os.path.join(settings.MEDIA_ROOT, "square_thumbnails"),
-        os.path.join(settings.MEDIA_ROOT, "thumbnails_big"),
-    ]
-    for directory in thumbnail_dirs:
-        os.makedirs(directory, exist_ok=True)
+    _ensure_thumbnail_dirs()
 
     lrj = LongRunningJob.get_or_create_job(
         user=user,
@@ -217,26 +220,24 @@ def scan_photos(
     try:
         if scan_directory == "":
             scan_directory = user.scan_directory
-        photo_list = []
         if scan_files:
+            photo_list = []
             walk_files(scan_files, photo_list)
+            paths = iter(photo_list)
         else:
-            walk_directory(scan_directory, photo_list)
-        files_found = len(photo_list)
-        last_scan = (
-            LongRunningJob.objects.filter(finished=True)
-            .filter(job_type=1)
-            .filter(started_by=user)
-            .order_by("-finished_at")
-            .first()
-        )
+            # Generator: paths stream out of the walk instead of being
+            # materialized into one big list first.
+            paths = iter_files(scan_directory)
+        last_scan = get_last_finished_job(user, LongRunningJob.JOB_SCAN_PHOTOS)
 
         # === PHASE 1: Group files by (directory, basename) ===
         # This ensures RAW+JPEG pairs are processed together, eliminating race conditions
         file_groups: dict[tuple[str, str], list[str]] = defaultdict(list)
         metadata_paths: list[str] = []
 
-        for path in photo_list:
+        files_found = 0
+        for path in paths:
+            files_found += 1
             if is_metadata(path):
                 # Metadata files are processed after their parent photos exist
                 metadata_paths.append(path)
@@ -245,6 +246,17 @@ def scan_photos(
                 group_key = get_file_grouping_key(path)
                 file_groups[group_key].append(path)
 
+        # Resolve which paths already belong to a Photo with one bulk query
+        # per 1000 paths instead of an EXISTS round-trip per file
+        known_paths: set[str] = set()
+        all_paths = [path for paths in file_groups.values() for path in paths]
+        for offset in range(0, len(all_paths), 1000):
+            known_paths.update(
+                File.objects.filter(
+                    path__in=all_paths[offset : offset + 1000], photo__isnull=False
+                ).values_list("path", flat=True)
+            )
+
         # Determine which groups need processing
         groups_to_process: list[tuple[tuple[str, str], list[str]]] = []
 
@@ -257,7 +269,7 @@ def scan_photos(
                 files_to_check.extend(get_sidecar_files_in_priority_order(path))
 
                 if (
-                    not Photo.objects.filter(files__path=path).exists()
+                    path not in known_paths
                     or full_scan
                     or not last_scan
                     or any(
@@ -284,31 +296,20 @@ def scan_photos(
         )
 
         # === PHASE 2: Process each file group ===
-        # Process groups sequentially to avoid race conditions
-        # Each group creates one Photo with all file variants
+        # Each group creates one Photo with all file variants. Groups fan out
+        # across workers in parallel; only the metadata tail is gated on the
+        # group finishing, since sidecars need their parent photos to exist.
         image_group_id = str(uuid.uuid4())
 
-        for group_key, paths in groups_to_process:
-            AsyncTask(
-                handle_file_group,
-                user,
-                paths,
-                job_id,
-                group=image_group_id,
-            ).run()
-
-        # If there are only metadata files (no image groups queued), process metadata now
-        if not groups_to_process and metadata_paths:
-            util.logger.info(
-                f"No images to process, processing {len(metadata_paths)} metadata files directly"
-            )
-            for path in metadata_paths:
-                photo_scanner(user, last_scan, full_scan, path, job_id)
+        bulk_enqueue(
+            handle_file_group,
+            ((user, paths, job_id) for _group_key, paths in groups_to_process),
+            group=image_group_id,
+        )
 
-        # If there are images and metadata, enqueue a sentinel task that waits for the image group
         if groups_to_process and metadata_paths:
             util.logger.info(
-                f"Scheduling sentinel to process {len(metadata_paths)} metadata files after {len(groups_to_process)} image groups"
+                f"Queueing sentinel for {len(metadata_paths)} metadata files after {len(groups_to_process)} image groups"
             )
             AsyncTask(
                 wait_for_group_and_process_metadata,
@@ -318,9 +319,14 @@ def scan_photos(
                 full_scan,
                 job_id,
                 len(groups_to_process),
-                attempt=1,
-                max_attempts=2,
             ).run()
+        elif metadata_paths:
+            # Only metadata files (no image groups queued): process metadata now
+            util.logger.info(
+                f"No images to process, processing {len(metadata_paths)} metadata files directly"
+            )
+            for path in metadata_paths:
+                photo_scanner(user, last_scan, full_scan, path, job_id)
 
         util.logger.info(f"Scanned {files_found} files in : {scan_directory}")
 
@@ -395,33 +401,40 @@ def scan_missing_photos(user, job_id: UUID):
         job_id=job_id,
     )
     try:
-        existing_photos = Photo.objects.filter(owner=user.id).order_by("image_hash")
+        existing_photos = (
+            Photo.objects.filter(owner=user.id)
+            .order_by("image_hash")
+            .only("image_hash")
+        )
 
-        paginator = Paginator(existing_photos, 5000)
-        lrj.update_progress(current=0, target=paginator.num_pages)
+        # One progress tick per 5000 photos (minimum one), matching the old
+        # Paginator page count, but stream rows through an iterator instead
+        # of materializing whole pages of hydrated Photo instances.
+        page_size = 5000
+        photo_count = existing_photos.count()
+        lrj.update_progress(current=0, target=max(1, -(-photo_count // page_size)))
 
         to_delete_photo_ids = []
         deleted_count = 0
+        processed = 0
+
+        for existing_photo in existing_photos.iterator(chunk_size=2000):
+            # Existing logic (kept) – may update internal state, sidecar checks, etc.
+            try:
+                existing_photo._check_files()
+            except Exception:
+                util.logger.exception(
+                    f"Photo {existing_photo.image_hash} _check_files failed"
+                )
 
-        for page in range(1, paginator.num_pages + 1):
-            page_photos = paginator.page(page).object_list
-            for existing_photo in page_photos:
-                # Existing logic (kept) – may update internal state, sidecar checks, etc.
-                try:
-                    existing_photo._check_files()
-                except Exception:
-                    util.logger.exception(
-                        f"Photo {existing_photo.image_hash} _check_files failed"
-                    )
-
-                # New: Determine if photo is physically gone
-                try:
-                    if existing_photo.missing_on_disk():
-                        to_delete_photo_ids.append(existing_photo.pk)
-                except Exception:
-                    util.logger.exception(
-                        f"Photo {existing_photo.image_hash} missing_on_disk check failed"
-                    )
+            # Determine if photo is physically gone
+            try:
+                if existing_photo.missing_on_disk():
+                    to_delete_photo_ids.append(existing_photo.pk)
+            except Exception:
+                util.logger.exception(
+                    f"Photo {existing_photo.image_hash} missing_on_disk check failed"
+                )
 
             # Periodically delete in batches to keep memory down.
             if len(to_delete_photo_ids) >= 500:
@@ -432,6 +445,11 @@ def scan_missing_photos(user, job_id: UUID):
                 )
                 to_delete_photo_ids = []
 
+            processed += 1
+            if processed % page_size == 0:
+                update_scan_counter(job_id)
+
+        if processed % page_size != 0 or processed == 0:
             update_scan_counter(job_id)
 
         # Delete any remaining photos
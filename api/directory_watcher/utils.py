@@ -4,10 +4,14 @@ Utility functions for directory scanning and job management.
 
 import os
 import stat
+from collections import deque
+from functools import lru_cache
 
 from constance import config as site_config
-from django.db.models import F
+from django.db.models import BooleanField, Case, DateTimeField, F, Value, When
 from django.utils import timezone
+from django_q.brokers import get_broker
+from django_q.tasks import AsyncTask
 
 from api.models import LongRunningJob
 
@@ -20,28 +24,40 @@ def _is_allowed_hidden_path(path):
     return os.path.basename(os.path.abspath(path)) in ALLOWED_HIDDEN_SCAN_DIRECTORIES
 
 
+@lru_cache(maxsize=8)
+def _parse_skip_patterns(skip_patterns):
+    """Split and strip a SKIP_PATTERNS config string, memoized per string."""
+    return tuple(
+        pattern for pattern in map(str.strip, skip_patterns.split(",")) if pattern
+    )
+
+
 def should_skip(path):
     """Check if a path should be skipped based on configured patterns."""
-    if not site_config.SKIP_PATTERNS:
+    skip_patterns = site_config.SKIP_PATTERNS
+    if not skip_patterns:
         return False
 
-    skip_patterns = site_config.SKIP_PATTERNS
-    skip_list = skip_patterns.split(",")
-    skip_list = map(str.strip, skip_list)
+    # Keyed on the config string itself, so runtime config changes still
+    # take effect while the split/strip work is done once per value.
+    return any(pattern in path for pattern in _parse_skip_patterns(skip_patterns))
+
+@lru_cache(maxsize=8)
+def _parse_skip_extensions(configured_extensions):
+    """Normalize a SCAN_SKIP_EXTENSIONS config string, memoized per string."""
+    return frozenset(
+        ext if ext.startswith(".") else f".{ext}"
+        for ext in (value.strip().lower() for value in configured_extensions.split(","))
+        if ext
+    )
 
-    res = [ele for ele in skip_list if (ele in path)]
-    return bool(res)
 
 def get_skipped_scan_extensions():
     """Return configured file extensions excluded from scan collection."""
     configured_extensions = getattr(
         site_config, "SCAN_SKIP_EXTENSIONS", DEFAULT_SCAN_SKIP_EXTENSIONS
     )
-    return {
-        ext if ext.startswith(".") else f".{ext}"
-        for ext in (value.strip().lower() for value in configured_extensions.split(","))
-        if ext
-    }
+    return _parse_skip_extensions(configured_extensions)
 
 def has_skipped_extension(path):
     """Check whether a path matches a file extension excluded from scanning."""
@@ -72,21 +88,45 @@ else:
         return os.path.basename(path).startswith(".")
 
 
+def iter_files(directory):
+    """
+    Walk a directory tree and yield file paths as they are discovered.
+
+    Iterative (explicit stack) rather than recursive, so memory stays
+    bounded by directory depth instead of total file count, and callers
+    can start processing paths before the walk completes.
+
+    Args:
+        directory: Directory to scan
+
+    Yields:
+        File paths that pass the hidden/skip-pattern/extension filters
+    """
+    stack = deque([directory])
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                # DirEntry caches the directory listing metadata, so entry.path
+                # and entry.is_dir(follow_symlinks=False) avoid a stat() per entry.
+                fpath = entry.path
+                if is_hidden(fpath) or should_skip(fpath) or has_skipped_extension(fpath):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(fpath)
+                else:
+                    yield fpath
+
+
 def walk_directory(directory, callback):
     """
-    Recursively walk a directory and collect file paths.
-    
+    Walk a directory and collect file paths.
+
     Args:
         directory: Directory to scan
         callback: List to append file paths to
     """
-    for file in os.scandir(directory):
-        fpath = os.path.join(directory, file)
-        if not is_hidden(fpath) and not should_skip(fpath) and not has_skipped_extension(fpath):
-            if os.path.isdir(fpath):
-                walk_directory(fpath, callback)
-            else:
-                callback.append(fpath)
+    callback.extend(iter_files(directory))
 
 
 def walk_files(scan_files, callback):
@@ -102,6 +142,84 @@ def walk_files(scan_files, callback):
             callback.append(fpath)
 
 
+def get_last_finished_job(user, job_type):
+    """
+    Return the most recently finished job of the given type for a user.
+
+    Shared by the scan/processing jobs so each phase resolves its reference
+    point with one query instead of spelling the ORDER BY lookup inline.
+    """
+    return (
+        LongRunningJob.objects.filter(finished=True, job_type=job_type, started_by=user)
+        .order_by("-finished_at")
+        .first()
+    )
+
+
+def bulk_enqueue(func, args_iter, group=None):
+    """
+    Enqueue one django-q task per argument tuple through a shared broker.
+
+    AsyncTask().run() resolves the broker on every call, so a fanout of
+    thousands of tasks pays a broker lookup (and, for network brokers, a
+    fresh connection) per task. Reusing one broker instance keeps the whole
+    fanout on a single connection. The ORM broker has no pipelined bulk
+    insert, so tasks are still pushed one by one.
+
+    Args:
+        func: The task function to enqueue
+        args_iter: Iterable of positional-argument tuples, one task each
+        group: Optional django-q group id for the tasks
+    """
+    broker = get_broker()
+    options = {"broker": broker}
+    if group is not None:
+        options["group"] = group
+    for args in args_iter:
+        AsyncTask(func, *args, **options).run()
+
+
+class ProgressThrottle:
+    """
+    Buffer progress ticks for an in-process bulk phase and flush them as one
+    relative UPDATE roughly every 1% of the target.
+
+    Only clean ticks should be buffered: failed items still go through
+    update_scan_counter directly (after a flush) so their errors land in the
+    job result. Use as a context manager so leftover ticks flush when the
+    phase ends; flush also performs the completion-detecting UPDATE.
+    """
+
+    def __init__(self, job_id, target, flush_every=None):
+        self.job_id = job_id
+        self.flush_every = flush_every or max(1, target // 100)
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def tick(self, n=1):
+        self._pending += n
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        LongRunningJob.objects.filter(job_id=self.job_id).update(
+            progress_current=F("progress_current") + self._pending
+        )
+        self._pending = 0
+        LongRunningJob.objects.filter(
+            job_id=self.job_id,
+            finished=False,
+            progress_current__gte=F("progress_target"),
+        ).update(finished=True, finished_at=timezone.now())
+
+
 def update_scan_counter(job_id, failed=False, error=None):
     """
     Update the progress counter for a long-running job.
@@ -114,11 +232,36 @@ def update_scan_counter(job_id, failed=False, error=None):
         failed: Whether this item failed processing
         error: Error message if failed
     """
-    # Increment the current progress and get the updated job
+    if not failed and error is None:
+        # Common path: one atomic UPDATE that increments the counter and
+        # flips finished/finished_at when the incremented value reaches the
+        # target, instead of an increment plus refetch plus save.
+        LongRunningJob.objects.filter(job_id=job_id).update(
+            progress_current=F("progress_current") + 1,
+            finished=Case(
+                When(
+                    progress_current__gte=F("progress_target") - 1,
+                    then=Value(True),
+                ),
+                default=F("finished"),
+                output_field=BooleanField(),
+            ),
+            finished_at=Case(
+                When(
+                    progress_current__gte=F("progress_target") - 1,
+                    then=Value(timezone.now()),
+                ),
+                default=F("finished_at"),
+                output_field=DateTimeField(),
+            ),
+        )
+        return
+
+    # Error path: increment the current progress and get the updated job
     LongRunningJob.objects.filter(job_id=job_id).update(
         progress_current=F("progress_current") + 1
     )
-    
+
     # Refetch the job to get the updated progress_current value
     job = LongRunningJob.objects.filter(job_id=job_id).first()
     if not job:
@@ -22,23 +22,140 @@ With 300k photos:
 - New: ~100-200MB RAM (batch + hash list only)
 """
 
+import os
+import time
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 from django.db.models import Q
 
 from api.models import Photo
 from api.models.duplicate import Duplicate
 from api.models.file import File
 from api.models.long_running_job import LongRunningJob
-from api.perceptual_hash import DEFAULT_HAMMING_THRESHOLD, hamming_distance
+from api.perceptual_hash import DEFAULT_HAMMING_THRESHOLD, calculate_hash_from_thumbnail
 from api.util import logger
 
 
+def _int_hamming_distance(a: int, b: int) -> int:
+    """
+    Hamming distance between two perceptual hashes pre-converted to ints.
+
+    A single XOR plus int.bit_count() (CPython's popcount) replaces the
+    per-call hex parsing and bit array subtraction of
+    api.perceptual_hash.hamming_distance, which dominates tree traversal
+    when called once per visited node.
+    """
+    return (a ^ b).bit_count()
+
+
+# Byte -> set-bit-count table for the vectorized matcher. Indexing XOR results
+# through this and summing the bytes gives popcounts without materializing the
+# 8x larger np.unpackbits intermediate.
+_POPCOUNT_TABLE = (
+    np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)
+    .sum(axis=1)
+    .astype(np.uint8)
+)
+
+# np.bitwise_count (NumPy >= 2.0) is a native popcount ufunc; preferred over
+# the lookup table when present.
+_HAS_BITWISE_COUNT = hasattr(np, "bitwise_count")
+
+# Above this photo count the O(n^2) vectorized pass gets slower than the
+# batched BK-tree, so the tree path stays as the fallback.
+VECTORIZED_MAX_PHOTOS = 20000
+
+# Rows of the distance matrix computed per step; caps peak memory at
+# O(chunk * n * hash_bytes) instead of O(n^2).
+_VECTOR_CHUNK_ROWS = 512
+
+
+def _cross_hamming_pairs(queries, corpus, threshold):
+    """
+    Yield (i, j) pairs where queries[i] and corpus[j] are within threshold.
+
+    Both arrays are uint64 vectors of 64-bit perceptual hashes. The kernel
+    XORs one chunk of queries against the whole corpus and popcounts in C,
+    replacing a Python loop over every (query, corpus) combination.
+    """
+    for start in range(0, queries.shape[0], _VECTOR_CHUNK_ROWS):
+        block = queries[start : start + _VECTOR_CHUNK_ROWS]
+        xor = block[:, None] ^ corpus[None, :]
+        if _HAS_BITWISE_COUNT:
+            dist = np.bitwise_count(xor)
+        else:
+            dist = _POPCOUNT_TABLE[xor[..., None].view(np.uint8)].sum(
+                axis=-1, dtype=np.uint16
+            )
+        for i_off, j in np.argwhere(dist <= threshold):
+            yield start + int(i_off), int(j)
+
+
+def _find_similar_pairs_vectorized(hash_matrix, threshold):
+    """
+    Yield index pairs (i, j) with i < j whose Hamming distance is <= threshold.
+
+    hash_matrix is an (n, hash_bytes) uint8 array of packed perceptual
+    hashes. Each chunk of rows is XORed against all following rows in one
+    numpy operation, so the per-pair work happens in C instead of one
+    Python-level distance call per comparison.
+    """
+    n = hash_matrix.shape[0]
+    # Widening the byte rows to uint64 lanes lets np.bitwise_count run its
+    # SIMD popcount over 8 bytes per element; the byte lookup table stays as
+    # the fallback for older NumPy or odd hash widths.
+    use_lanes = _HAS_BITWISE_COUNT and hash_matrix.shape[1] % 8 == 0
+    lanes = hash_matrix.view(np.uint64) if use_lanes else hash_matrix
+    for start in range(0, n, _VECTOR_CHUNK_ROWS):
+        chunk = lanes[start : start + _VECTOR_CHUNK_ROWS]
+        # Only rows from `start` on: pairs before the chunk were already
+        # emitted when their own chunk was the query side.
+        rest = lanes[start:]
+        xor = np.bitwise_xor(chunk[:, None, :], rest[None, :, :])
+        if use_lanes:
+            dist = np.bitwise_count(xor).sum(axis=-1, dtype=np.uint16)
+        else:
+            dist = _POPCOUNT_TABLE[xor].sum(axis=-1, dtype=np.uint16)
+        for i_off, j_off in np.argwhere(dist <= threshold):
+            i = start + int(i_off)
+            j = start + int(j_off)
+            if i < j:
+                yield i, j
+
+
+class _BKNode:
+    """
+    One BK-tree node. __slots__ keeps the per-node footprint to a few
+    machine words instead of a dict per node, which matters once trees
+    reach tens of thousands of entries.
+    """
+
+    __slots__ = ("child_dists", "child_nodes", "hash", "id")
+
+    def __init__(self, item_id, item_hash):
+        self.id = item_id
+        self.hash = item_hash
+        self.child_dists = []
+        self.child_nodes = []
+
+    def __getitem__(self, key):
+        # Nodes used to be plain dicts; keep dict-style access working for
+        # existing introspection
+        return getattr(self, key)
+
+
 class BKTree:
     """
     Burkhard-Keller Tree for efficient Hamming distance queries.
 
     Achieves O(log n) average case by pruning branches using triangle inequality.
+
+    Children are kept in parallel lists sorted by edge distance, so a search
+    locates the admissible [min_dist, max_dist] slice with two binary
+    searches instead of iterating and filtering every child.
     """
 
     def __init__(self, distance_func):
@@ -50,20 +167,22 @@ class BKTree:
         """Add an item (id, hash) to the tree."""
         self.size += 1
         if self.root is None:
-            self.root = {"id": item_id, "hash": item_hash, "children": {}}
+            self.root = _BKNode(item_id, item_hash)
             return
 
+        # Hoist the bound method out of the descent: attribute lookups per
+        # level add up over thousands of inserts.
+        distance = self.distance
         node = self.root
         while True:
-            dist = self.distance(item_hash, node["hash"])
-            if dist in node["children"]:
-                node = node["children"][dist]
+            dist = distance(item_hash, node.hash)
+            child_dists = node.child_dists
+            idx = bisect_left(child_dists, dist)
+            if idx < len(child_dists) and child_dists[idx] == dist:
+                node = node.child_nodes[idx]
             else:
-                node["children"][dist] = {
-                    "id": item_id,
-                    "hash": item_hash,
-                    "children": {},
-                }
+                child_dists.insert(idx, dist)
+                node.child_nodes.insert(idx, _BKNode(item_id, item_hash))
                 break
 
     def search(self, query_hash, threshold):
@@ -73,20 +192,19 @@ class BKTree:
 
         results = []
         candidates = [self.root]
+        distance = self.distance
 
         while candidates:
             node = candidates.pop()
-            dist = self.distance(query_hash, node["hash"])
+            dist = distance(query_hash, node.hash)
 
             if dist <= threshold:
-                results.append((node["id"], dist))
+                results.append((node.id, dist))
 
-            min_dist = max(0, dist - threshold)
-            max_dist = dist + threshold
-
-            for d, child in node["children"].items():
-                if min_dist <= d <= max_dist:
-                    candidates.append(child)
+            child_dists = node.child_dists
+            lo = bisect_left(child_dists, dist - threshold)
+            hi = bisect_right(child_dists, dist + threshold)
+            candidates.extend(node.child_nodes[lo:hi])
 
         return results
 
@@ -99,13 +217,20 @@ class UnionFind:
         self.rank = {}
 
     def find(self, x):
-        if x not in self.parent:
-            self.parent[x] = x
+        parent = self.parent
+        if x not in parent:
+            parent[x] = x
             self.rank[x] = 0
             return x
-        if self.parent[x] != x:
-            self.parent[x] = self.find(self.parent[x])
-        return self.parent[x]
+        # Classical two-pass compression: walk to the root, then re-point
+        # every node on the path directly at it. Iterative, so long chains
+        # cannot hit the recursion limit.
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
 
     def union(self, x, y):
         px, py = self.find(x), self.find(y)
@@ -316,6 +441,14 @@ def detect_visual_duplicates(
     if total < 2:
         return 0
 
+    # Small and mid-size libraries fit one packed hash matrix comfortably;
+    # a single vectorized pass beats the interpreter-bound tree traversal
+    # there. The batched BK-tree remains the fallback for larger libraries.
+    if total <= VECTORIZED_MAX_PHOTOS:
+        return _detect_visual_duplicates_vectorized(
+            user, photos_queryset, total, threshold, progress_callback
+        )
+
     logger.info(
         f"Processing {total} photos in batches of {batch_size} (user: {user.username})"
     )
@@ -330,6 +463,11 @@ def detect_visual_duplicates(
     # In practice, Python overhead means ~25-40MB for list + objects
     all_photo_hashes = []
 
+    # Exact-hash pre-grouping: photos sharing a hash behave identically in
+    # every comparison, so only one representative per distinct hash enters
+    # the tree and the cross-batch scan; the rest are unioned to it directly.
+    hash_representatives = {}
+
     # Calculate number of batches
     num_batches = (total + batch_size - 1) // batch_size
 
@@ -352,7 +490,9 @@ def detect_visual_duplicates(
         )
 
         # Build temporary BK-Tree for current batch (for efficient within-batch search)
-        batch_tree = BKTree(hamming_distance)
+        # Hashes are converted from hex to int once here so every distance
+        # computation in the traversal is a single XOR + popcount.
+        batch_tree = BKTree(_int_hamming_distance)
         batch_hashes = []
 
         for photo in batch_photos:
@@ -360,8 +500,21 @@ def detect_visual_duplicates(
             phash = photo["perceptual_hash"]
 
             if phash:
-                batch_tree.add(photo_id, phash)
-                batch_hashes.append((photo_id, phash))
+                try:
+                    phash_int = int(phash, 16)
+                except ValueError:
+                    logger.warning(
+                        f"Skipping photo {photo_id}: malformed perceptual hash"
+                    )
+                    continue
+                representative = hash_representatives.get(phash_int)
+                if representative is not None:
+                    uf.union(representative, photo_id)
+                    pairs_found += 1
+                    continue
+                hash_representatives[phash_int] = photo_id
+                batch_tree.add(photo_id, phash_int)
+                batch_hashes.append((photo_id, phash_int))
 
         # Find duplicates within current batch using BK-Tree
         for photo_id, phash in batch_hashes:
@@ -389,6 +542,19 @@ def detect_visual_duplicates(
     # This ensures we don't miss duplicates between distant batches
     processed = 0
 
+    # Pack the hash ints into one uint64 vector so the cross-batch scan runs
+    # as a numpy XOR/popcount kernel; hashes wider than 64 bits overflow and
+    # keep the Python fallback.
+    all_ids = [photo_id for photo_id, _ in all_photo_hashes]
+    try:
+        all_lanes = np.fromiter(
+            (phash for _, phash in all_photo_hashes),
+            dtype=np.uint64,
+            count=len(all_photo_hashes),
+        )
+    except OverflowError:
+        all_lanes = None
+
     for batch_idx in range(num_batches):
         start_idx = batch_idx * batch_size
         end_idx = min(start_idx + batch_size, len(all_photo_hashes))
@@ -402,17 +568,26 @@ def detect_visual_duplicates(
             f"Pass 2: Comparing batch {batch_idx + 1}/{num_batches} against previous photos"
         )
 
-        # Compare current batch against all previous photos
-        # Store the previous photos slice once to avoid repeated slicing
-        previous_hashes = all_photo_hashes[:start_idx] if start_idx > 0 else []
-
-        for photo_id, phash in batch_hashes:
-            # Only compare against photos in previous batches (avoid duplicate comparisons)
-            for prev_id, prev_hash in previous_hashes:
-                distance = hamming_distance(phash, prev_hash)
-                if distance <= threshold:
-                    uf.union(photo_id, prev_id)
+        if all_lanes is not None:
+            if start_idx > 0:
+                pairs = _cross_hamming_pairs(
+                    all_lanes[start_idx:end_idx], all_lanes[:start_idx], threshold
+                )
+                for i_off, j in pairs:
+                    uf.union(all_ids[start_idx + i_off], all_ids[j])
                     pairs_found += 1
+        else:
+            # Compare current batch against all previous photos
+            # Store the previous photos slice once to avoid repeated slicing
+            previous_hashes = all_photo_hashes[:start_idx] if start_idx > 0 else []
+
+            for photo_id, phash in batch_hashes:
+                # Only compare against photos in previous batches (avoid duplicate comparisons)
+                for prev_id, prev_hash in previous_hashes:
+                    distance = (phash ^ prev_hash).bit_count()
+                    if distance <= threshold:
+                        uf.union(photo_id, prev_id)
+                        pairs_found += 1
 
         processed += len(batch_hashes)
 
@@ -422,8 +597,80 @@ def detect_visual_duplicates(
 
     logger.info(f"Pass 2 complete. Total pairs found: {pairs_found}")
 
-    # Create duplicate groups from Union-Find groups
-    groups = uf.get_groups()
+    duplicates_created = _create_visual_duplicate_groups(user, uf.get_groups())
+
+    logger.info(
+        f"Visual duplicate detection for {user.username}: found {duplicates_created} groups from {pairs_found} pairs"
+    )
+    return duplicates_created
+
+
+def _detect_visual_duplicates_vectorized(
+    user, photos_queryset, total, threshold, progress_callback=None
+):
+    """
+    Single-pass visual duplicate detection over a packed numpy hash matrix.
+
+    All perceptual hashes are packed into one (n, hash_bytes) uint8 array
+    and pairwise distances are computed with chunked XOR + popcount, which
+    replaces the per-comparison Python loop of the BK-tree path.
+    """
+    # values_list + iterator streams plain tuples from the cursor, skipping
+    # the per-row dict construction and full-queryset materialization.
+    photo_ids = []
+    hex_hashes = []
+    expected_length = None
+    rows = photos_queryset.values_list("id", "perceptual_hash").iterator(
+        chunk_size=2000
+    )
+    for photo_id, phash in rows:
+        if not phash:
+            continue
+        if expected_length is None:
+            expected_length = len(phash)
+        if len(phash) != expected_length:
+            logger.warning(
+                f"Skipping photo {photo_id}: unexpected perceptual hash length"
+            )
+            continue
+        try:
+            hash_bytes = bytes.fromhex(phash)
+        except ValueError:
+            logger.warning(f"Skipping photo {photo_id}: malformed perceptual hash")
+            continue
+        photo_ids.append(photo_id)
+        hex_hashes.append(hash_bytes)
+
+    if len(photo_ids) < 2:
+        return 0
+
+    logger.info(
+        f"Processing {len(photo_ids)} photos in one vectorized pass (user: {user.username})"
+    )
+
+    hash_matrix = np.frombuffer(b"".join(hex_hashes), dtype=np.uint8).reshape(
+        len(photo_ids), -1
+    )
+
+    uf = UnionFind()
+    pairs_found = 0
+    for i, j in _find_similar_pairs_vectorized(hash_matrix, threshold):
+        uf.union(photo_ids[i], photo_ids[j])
+        pairs_found += 1
+
+    if progress_callback:
+        progress_callback(total, total, pairs_found)
+
+    duplicates_created = _create_visual_duplicate_groups(user, uf.get_groups())
+
+    logger.info(
+        f"Visual duplicate detection for {user.username}: found {duplicates_created} groups from {pairs_found} pairs"
+    )
+    return duplicates_created
+
+
+def _create_visual_duplicate_groups(user, groups):
+    """Persist Union-Find groups as VISUAL_DUPLICATE Duplicate records."""
     duplicates_created = 0
 
     for group in groups:
@@ -443,10 +690,61 @@ def detect_visual_duplicates(
         if duplicate:
             duplicates_created += 1
 
+    return duplicates_created
+
+
+def _backfill_missing_perceptual_hashes(user):
+    """
+    Compute perceptual hashes for photos that are missing one.
+
+    Photos without a hash are invisible to visual duplicate detection.
+    Hashing decodes the big thumbnail and runs a DCT per photo; PIL releases
+    the GIL for the decode, so the work fans out over a thread pool (a
+    process pool cannot be used: this runs inside a daemonic django-q
+    worker, which may not spawn child processes). Results are written back
+    with bulk_update in blocks instead of one UPDATE each.
+
+    Returns the number of photos that received a hash.
+    """
+    photos = list(
+        Photo.objects.filter(
+            Q(owner=user)
+            & Q(hidden=False)
+            & Q(in_trashcan=False)
+            & Q(removed=False)
+            # One OR inside a single filter: a queryset union here would run
+            # the scan twice and cannot be streamed
+            & (Q(perceptual_hash__isnull=True) | Q(perceptual_hash=""))
+            & Q(thumbnail__thumbnail_big__isnull=False)
+        )
+        .exclude(thumbnail__thumbnail_big="")
+        .select_related("thumbnail")
+    )
+    if not photos:
+        return 0
+
+    thumbnail_paths = [photo.thumbnail.thumbnail_big.path for photo in photos]
+    hashed = 0
+    updated = []
+    with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 2, 8)) as executor:
+        results = executor.map(calculate_hash_from_thumbnail, thumbnail_paths)
+        for photo, phash in zip(photos, results):
+            if not phash:
+                continue
+            photo.perceptual_hash = phash
+            updated.append(photo)
+            if len(updated) >= 500:
+                Photo.objects.bulk_update(updated, ["perceptual_hash"])
+                hashed += len(updated)
+                updated.clear()
+    if updated:
+        Photo.objects.bulk_update(updated, ["perceptual_hash"])
+        hashed += len(updated)
+
     logger.info(
-        f"Visual duplicate detection for {user.username}: found {duplicates_created} groups from {pairs_found} pairs"
+        f"Backfilled perceptual hashes for {hashed}/{len(photos)} photos (user: {user.username})"
     )
-    return duplicates_created
+    return hashed
 
 
 def batch_detect_duplicates(user, options=None):
@@ -488,11 +786,25 @@ def batch_detect_duplicates(user, options=None):
 
         total_found = 0
 
+        # Every set_result is a full UPDATE of the result JSON; for large
+        # batches the per-callback writes serialize on the job row, so cap
+        # them at roughly one per second. Terminal state is written by
+        # job.complete()/job.fail() regardless.
+        last_save = 0.0
+
+        def throttled_set_result(payload):
+            nonlocal last_save
+            now = time.monotonic()
+            if now - last_save < 1.0:
+                return
+            job.set_result(payload)
+            last_save = now
+
         # Detect exact copies
         if detect_exact:
 
             def progress_exact(current, total, found):
-                job.set_result(
+                throttled_set_result(
                     {
                         "stage": "exact_copies",
                         "current": current,
@@ -506,9 +818,10 @@ def batch_detect_duplicates(user, options=None):
 
         # Detect visual duplicates
         if detect_visual:
+            _backfill_missing_perceptual_hashes(user)
 
             def progress_visual(current, total, found):
-                job.set_result(
+                throttled_set_result(
                     {
                         "stage": "visual_duplicates",
                         "current": current,
@@ -1,4 +1,5 @@
 import os
+import shutil
 from mmap import ACCESS_READ, mmap
 
 import magic
@@ -12,13 +13,28 @@ GOOGLE_PIXEL_MOTION_PHOTO_MP4_SIGNATURES = [b"ftypmp42", b"ftypisom", b"ftypiso2
 # but we are interested only in the content of the video which is right after MotionPhoto_Data
 SAMSUNG_MOTION_PHOTO_MARKER = b"MotionPhoto_Data"
 
+# magic.Magic loads the whole libmagic database on init, so keep one
+# instance per process instead of rebuilding it for every file checked.
+_MAGIC = magic.Magic(mime=True)
+
+
+# All Google signatures share the "ftyp" box prefix, so the buffer can be
+# scanned once for the prefix and the brand checked in place, instead of one
+# full pass per signature.
+_GOOGLE_FTYP_PREFIX = b"ftyp"
+_GOOGLE_MP4_BRANDS = frozenset(
+    signature[len(_GOOGLE_FTYP_PREFIX) :]
+    for signature in GOOGLE_PIXEL_MOTION_PHOTO_MP4_SIGNATURES
+)
+
 
 def _locate_embedded_video_google(data):
-    signatures = GOOGLE_PIXEL_MOTION_PHOTO_MP4_SIGNATURES
-    for signature in signatures:
-        position = data.find(signature)
-        if position != -1:
+    position = data.find(_GOOGLE_FTYP_PREFIX)
+    while position != -1:
+        brand_start = position + len(_GOOGLE_FTYP_PREFIX)
+        if bytes(data[brand_start : brand_start + 4]) in _GOOGLE_MP4_BRANDS:
             return position - 4
+        position = data.find(_GOOGLE_FTYP_PREFIX, position + 1)
     return -1
 
 
@@ -29,33 +45,56 @@ def _locate_embedded_video_samsung(data):
     return -1
 
 
-def has_embedded_media(path: str) -> bool:
-    mime = magic.Magic(mime=True)
-    mime_type = mime.from_file(path)
+def scan_embedded(path: str) -> int:
+    """
+    Locate embedded video data in a motion photo.
+
+    Opens and maps the file once, checking both vendor markers, so the
+    detection and extraction entry points share a single scan instead of
+    each re-opening and re-scanning the file.
+
+    Returns the byte offset of the embedded video, or -1 if the file is
+    not a JPEG or carries no embedded media.
+    """
+    mime_type = _MAGIC.from_file(path)
     if mime_type != "image/jpeg":
-        return False
+        return -1
     with open(path, "rb") as image:
         with mmap(image.fileno(), 0, access=ACCESS_READ) as mm:
-            return (
-                _locate_embedded_video_samsung(mm) != -1
-                or _locate_embedded_video_google(mm) != -1
-            )
+            position = _locate_embedded_video_samsung(mm)
+            if position != -1:
+                return position
+            return _locate_embedded_video_google(mm)
+
+
+def has_embedded_media(path: str) -> bool:
+    return scan_embedded(path) != -1
 
 
 def extract_embedded_media(path: str, hash: str) -> str | None:
-    with open(str(path), "rb") as image:
-        with mmap(image.fileno(), 0, access=ACCESS_READ) as mm:
-            position = _locate_embedded_video_google(
-                mm
-            ) or _locate_embedded_video_google(mm)
-            if position == -1:
-                return None
-            output_dir = f"{settings.MEDIA_ROOT}/embedded_media"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            output_path = f"{output_dir}/{hash}_1.mp4"
-            with open(output_path, "wb+") as video:
-                mm.seek(position)
-                data = mm.read(mm.size())
-                video.write(data)
-            return output_path
+    position = scan_embedded(path)
+    if position == -1:
+        return None
+    output_dir = f"{settings.MEDIA_ROOT}/embedded_media"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    output_path = f"{output_dir}/{hash}_1.mp4"
+    with open(str(path), "rb") as image, open(output_path, "wb+") as video:
+        size = os.fstat(image.fileno()).st_size
+        offset = position
+        remaining = size - position
+        try:
+            # In-kernel copy: no multi-MB bytes object is materialized in
+            # user space. sendfile may copy less than asked, so loop.
+            while remaining > 0:
+                sent = os.sendfile(video.fileno(), image.fileno(), offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+        except OSError:
+            # Platforms/filesystems without sendfile support; resume from
+            # wherever the in-kernel copy stopped.
+            image.seek(offset)
+            shutil.copyfileobj(image, video)
+    return output_path
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import List
 
 import geopy
@@ -52,9 +53,31 @@ class Geocode:
         ]
 
 
+@lru_cache(maxsize=4)
+def _build_geocoder(provider, api_key, geocoder_class):
+    # api_key and geocoder_class only widen the cache key: a config change
+    # or a swapped-out geopy service must produce a fresh instance.
+    return Geocode(provider)
+
+
+def _get_geocoder() -> Geocode:
+    """
+    Return a Geocode instance for the configured provider.
+
+    Instances are cached so repeated lookups reuse the geopy client and its
+    connection pool instead of rebuilding both on every call.
+    """
+    provider = site_config.MAP_API_PROVIDER
+    return _build_geocoder(
+        provider,
+        site_config.MAP_API_KEY,
+        geopy.get_geocoder_for_service(provider),
+    )
+
+
 def reverse_geocode(lat: float, lon: float) -> dict:
     try:
-        return Geocode(site_config.MAP_API_PROVIDER).reverse(lat, lon)
+        return _get_geocoder().reverse(lat, lon)
     except Exception as e:
         util.logger.warning(f"Error while reverse geocoding: {e}")
         return {}
@@ -63,7 +86,7 @@ def reverse_geocode(lat: float, lon: float) -> dict:
 def search_location(query: str, limit: int = 5) -> List[dict]:
     """Search for locations by name/address using the configured map provider."""
     try:
-        return Geocode(site_config.MAP_API_PROVIDER).search(query, limit)
+        return _get_geocoder().search(query, limit)
     except Exception as e:
         util.logger.warning(f"Error while searching location: {e}")
         return []
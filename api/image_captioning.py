@@ -1,10 +1,19 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
 from constance import config as site_config
 
 # --- Configuration (from Environment Variables) ---
 BACKEND_HOST = os.getenv("BACKEND_HOST", "backend")
 
+# Keep-alive session: captioning fans out one request per photo, and a fresh
+# TCP connection per call leaves piles of TIME_WAIT sockets behind.
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+
+# (connect, read) timeouts; model inference can legitimately take a while
+_TIMEOUT = (5, 300)
+
 def generate_caption(image_path, blip=False, prompt=None):
     # Check if Moondream is selected as captioning model
     if site_config.CAPTIONING_MODEL == "moondream":
@@ -18,7 +27,11 @@ def generate_caption(image_path, blip=False, prompt=None):
             "max_tokens": 256,
         }
         try:
-            response = requests.post(f"http://{BACKEND_HOST}:8008/generate", json=json_data)
+            response = _SESSION.post(
+                f"http://{BACKEND_HOST}:8008/generate",
+                json=json_data,
+                timeout=_TIMEOUT,
+            )
 
             if response.status_code != 201:
                 print(
@@ -46,12 +59,14 @@ def generate_caption(image_path, blip=False, prompt=None):
         "onnx": False,
         "blip": blip,
     }
-    caption_response = requests.post(
-        f"http://{BACKEND_HOST}:8007/generate-caption", json=json_data
+    caption_response = _SESSION.post(
+        f"http://{BACKEND_HOST}:8007/generate-caption",
+        json=json_data,
+        timeout=_TIMEOUT,
     ).json()
 
     return caption_response["caption"]
 
 
 def unload_model():
-    requests.get(f"http://{BACKEND_HOST}:8007/unload-model")
+    _SESSION.get(f"http://{BACKEND_HOST}:8007/unload-model", timeout=_TIMEOUT)
@@ -1,5 +1,6 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import base64
 import io
 from PIL import Image
@@ -10,22 +11,52 @@ from constance import config as site_config
 # --- Configuration (from Environment Variables) ---
 BACKEND_HOST = os.getenv("BACKEND_HOST", "backend")
 
-def image_to_base64_data_uri(image_path):
-    """Convert image file to base64 data URI, converting to JPEG for compatibility"""
+# Keep-alive session towards the LLM service; avoids a TCP handshake (and a
+# lingering TIME_WAIT socket) per generated prompt.
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+
+# (connect, read) timeouts; generation on CPU can legitimately take a while
+_TIMEOUT = (5, 300)
+
+# Vision models resize inputs to a few hundred pixels internally, so
+# anything beyond this only inflates the base64 payload and prefill time.
+LLM_IMAGE_MAX_EDGE = 512
+
+
+def image_to_base64_data_uri(image_path, max_edge=LLM_IMAGE_MAX_EDGE):
+    """
+    Convert image file to base64 data URI, converting to JPEG for compatibility.
+
+    Images larger than max_edge on their long side are downscaled first;
+    pass max_edge=None to send the image at its original resolution.
+    """
     try:
-        # Open image with PIL and convert to RGB (handles WebP, PNG with transparency, etc.)
+        # Image.open only parses the header here, so format/size checks are
+        # cheap and the pixel data is not decoded unless needed.
         with Image.open(image_path) as img:
+            needs_resize = max_edge is not None and max(img.size) > max_edge
+
+            # Already a small-enough JPEG: encode the file bytes as they are
+            # and skip the full RGB decode + DCT re-encode round trip.
+            if img.format == "JPEG" and not needs_resize:
+                with open(image_path, "rb") as f:
+                    image_data = base64.b64encode(f.read()).decode("utf-8")
+                return f"data:image/jpeg;base64,{image_data}"
+
             # Convert to RGB mode (removes alpha channel if present)
             if img.mode != "RGB":
                 img = img.convert("RGB")
 
+            if needs_resize:
+                img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
             # Save as JPEG to memory buffer
             buffer = io.BytesIO()
-            img.save(buffer, format="JPEG", quality=95)
-            buffer.seek(0)
+            img.save(buffer, format="JPEG", quality=85)
 
-            # Encode to base64
-            image_data = base64.b64encode(buffer.getvalue()).decode("utf-8")
+            # Encode to base64; getbuffer avoids copying the buffer contents
+            image_data = base64.b64encode(buffer.getbuffer()).decode("utf-8")
 
         return f"data:image/jpeg;base64,{image_data}"
     except Exception as e:
@@ -64,7 +95,9 @@ def generate_prompt(prompt, image_path=None):
             return None
 
     try:
-        response = requests.post(f"http://{BACKEND_HOST}:8008/generate", json=json_data)
+        response = _SESSION.post(
+            f"http://{BACKEND_HOST}:8008/generate", json=json_data, timeout=_TIMEOUT
+        )
 
         if response.status_code != 201:
             print(
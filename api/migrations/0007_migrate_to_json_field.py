@@ -1,6 +1,6 @@
 import json
 
-from django.db import migrations, models
+from django.db import migrations, models, transaction
 
 
 class Migration(migrations.Migration):
@@ -9,13 +9,65 @@ class Migration(migrations.Migration):
     ]
 
     def forwards_func(apps, schema):
+        # On backends with JSON functions a single server-side UPDATE wraps
+        # every path without pulling rows into Python at all.
+        if schema.connection.vendor == "postgresql":
+            schema.execute(
+                "UPDATE api_photo SET image_paths = jsonb_build_array(image_path) "
+                "WHERE image_path IS NOT NULL "
+                "AND (image_paths IS NULL OR image_paths = '[]'::jsonb)"
+            )
+            return
+        if schema.connection.vendor == "sqlite":
+            schema.execute(
+                "UPDATE api_photo SET image_paths = json_array(image_path) "
+                "WHERE image_path IS NOT NULL "
+                "AND (image_paths IS NULL OR image_paths = '[]')"
+            )
+            return
+
+        Photo = apps.get_model("api", "Photo")
+        # Other backends: stream rows and write back in batches, one UPDATE
+        # per 1000 photos instead of one UPDATE (and one transaction) per photo.
+        to_update = []
+        with transaction.atomic():
+            for obj in Photo.objects.only("image_path", "image_paths").iterator(
+                chunk_size=2000
+            ):
+                try:
+                    obj.image_paths.append(obj.image_path)
+                except json.decoder.JSONDecodeError:
+                    print("Cannot convert {} object".format(obj.image_path))
+                    continue
+                to_update.append(obj)
+                if len(to_update) >= 1000:
+                    Photo.objects.bulk_update(
+                        to_update, ["image_paths"], batch_size=1000
+                    )
+                    to_update.clear()
+            if to_update:
+                Photo.objects.bulk_update(to_update, ["image_paths"], batch_size=1000)
+
+    def reverse_func(apps, schema):
         Photo = apps.get_model("api", "Photo")
-        for obj in Photo.objects.all():
-            try:
-                obj.image_paths.append(obj.image_path)
-                obj.save()
-            except json.decoder.JSONDecodeError:
-                print("Cannot convert {} object".format(obj.image_path))
+        # Same streamed, batched pattern as forwards_func: restore image_path
+        # from the first JSON entry without a per-row UPDATE.
+        to_update = []
+        with transaction.atomic():
+            for obj in Photo.objects.only("image_path", "image_paths").iterator(
+                chunk_size=2000
+            ):
+                if not obj.image_paths:
+                    continue
+                obj.image_path = obj.image_paths[0]
+                to_update.append(obj)
+                if len(to_update) >= 1000:
+                    Photo.objects.bulk_update(
+                        to_update, ["image_path"], batch_size=1000
+                    )
+                    to_update.clear()
+            if to_update:
+                Photo.objects.bulk_update(to_update, ["image_path"], batch_size=1000)
 
     operations = [
         migrations.AddField(
@@ -23,5 +75,5 @@ class Migration(migrations.Migration):
             name="image_paths",
             field=models.JSONField(db_index=True, default=list),
         ),
-        migrations.RunPython(forwards_func),
+        migrations.RunPython(forwards_func, reverse_func),
     ]
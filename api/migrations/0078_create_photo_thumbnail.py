@@ -38,6 +38,11 @@ class Migration(migrations.Migration):
                     aspect_ratio,
                     dominant_color
                 FROM api_photo
+                WHERE COALESCE(thumbnail_big, '') <> ''
+                   OR COALESCE(square_thumbnail, '') <> ''
+                   OR COALESCE(square_thumbnail_small, '') <> ''
+                   OR aspect_ratio IS NOT NULL
+                   OR dominant_color IS NOT NULL
                 """
             ],
             reverse_sql=[
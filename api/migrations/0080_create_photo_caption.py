@@ -1,6 +1,6 @@
 # Generated migration for PhotoCaption model
 
-from django.db import migrations, models
+from django.db import migrations, models, transaction
 import django.db.models.deletion
 
 
@@ -10,31 +10,51 @@ def migrate_caption_data(apps, schema_editor):
     PhotoCaption = apps.get_model('api', 'PhotoCaption')
     
     db_alias = schema_editor.connection.alias
-    
-    # Create PhotoCaption instances for all photos that have caption data
+
+    # On PostgreSQL a server-side INSERT ... SELECT copies the caption data
+    # without building a PhotoCaption instance per row in Python.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "INSERT INTO api_photo_caption "
+            "(photo_id, captions_json, search_captions, created_at, updated_at) "
+            "SELECT image_hash, captions_json, search_captions, NOW(), NOW() "
+            "FROM api_photo "
+            "WHERE search_captions IS NOT NULL "
+            "OR (captions_json IS NOT NULL AND captions_json <> '{}'::jsonb) "
+            "ON CONFLICT (photo_id) DO NOTHING"
+        )
+        return
+
+    # SQLite fallback: create PhotoCaption instances for all photos that
+    # have caption data. One predicate mirroring the SQL above - the old
+    # trailing .exclude(captions_json={}) also dropped photos that had
+    # search_captions but an empty captions dict.
     photos_with_captions = Photo.objects.using(db_alias).filter(
-        models.Q(captions_json__isnull=False) | models.Q(search_captions__isnull=False)
-    ).exclude(captions_json={})
+        models.Q(search_captions__isnull=False)
+        | (models.Q(captions_json__isnull=False) & ~models.Q(captions_json={}))
+    )
     
     captions_to_create = []
-    
-    for photo in photos_with_captions.iterator():
-        captions_to_create.append(
-            PhotoCaption(
-                photo_id=photo.image_hash,
-                captions_json=photo.captions_json,
-                search_captions=photo.search_captions
+
+    # Single transaction so the batched inserts share one commit
+    with transaction.atomic(using=db_alias):
+        for photo in photos_with_captions.iterator():
+            captions_to_create.append(
+                PhotoCaption(
+                    photo_id=photo.image_hash,
+                    captions_json=photo.captions_json,
+                    search_captions=photo.search_captions
+                )
             )
-        )
-        
-        # Process in batches to avoid memory issues
-        if len(captions_to_create) >= 1000:
+
+            # Process in batches to avoid memory issues
+            if len(captions_to_create) >= 1000:
+                PhotoCaption.objects.using(db_alias).bulk_create(captions_to_create, ignore_conflicts=True)
+                captions_to_create = []
+
+        # Create remaining captions
+        if captions_to_create:
             PhotoCaption.objects.using(db_alias).bulk_create(captions_to_create, ignore_conflicts=True)
-            captions_to_create = []
-    
-    # Create remaining captions
-    if captions_to_create:
-        PhotoCaption.objects.using(db_alias).bulk_create(captions_to_create, ignore_conflicts=True)
 
 
 def reverse_migrate_caption_data(apps, schema_editor):
@@ -44,15 +64,17 @@ def reverse_migrate_caption_data(apps, schema_editor):
     
     db_alias = schema_editor.connection.alias
     
-    # Update photos with caption data from PhotoCaption instances
-    for caption in PhotoCaption.objects.using(db_alias).all():
-        try:
-            photo = Photo.objects.using(db_alias).get(image_hash=caption.photo_id)
-            photo.captions_json = caption.captions_json
-            photo.search_captions = caption.search_captions
-            photo.save(update_fields=['captions_json', 'search_captions'])
-        except Photo.DoesNotExist:
-            continue
+    # Update photos with caption data from PhotoCaption instances, all in
+    # one transaction rather than one autocommit per save
+    with transaction.atomic(using=db_alias):
+        for caption in PhotoCaption.objects.using(db_alias).iterator(chunk_size=2000):
+            try:
+                photo = Photo.objects.using(db_alias).get(image_hash=caption.photo_id)
+                photo.captions_json = caption.captions_json
+                photo.search_captions = caption.search_captions
+                photo.save(update_fields=['captions_json', 'search_captions'])
+            except Photo.DoesNotExist:
+                continue
 
 
 class Migration(migrations.Migration):
@@ -1,6 +1,6 @@
 # Generated migration for PhotoSearch model
 
-from django.db import migrations, models
+from django.db import migrations, models, transaction
 import django.db.models.deletion
 
 
@@ -12,34 +12,48 @@ def migrate_search_data(apps, schema_editor):
     
     db_alias = schema_editor.connection.alias
     
-    # Create PhotoSearch instances for all photos that have search data
+    # Collect all search data keyed on photo before writing anything, so one
+    # upsert covers both sources instead of a get_or_create round-trip per
+    # caption row.
+    search_data = {}
+
     photos_with_search_data = Photo.objects.using(db_alias).filter(
         search_location__isnull=False
     ).exclude(search_location='')
-    
-    search_instances_to_create = []
-    
-    for photo in photos_with_search_data.iterator():
-        search_instances_to_create.append(
+
+    for photo_id, search_location in photos_with_search_data.values_list(
+        'image_hash', 'search_location'
+    ).iterator(chunk_size=2000):
+        search_data[photo_id] = {
+            'search_location': search_location,
+            'search_captions': '',  # Will be populated below
+        }
+
+    captions_with_search_data = PhotoCaption.objects.using(db_alias).filter(
+        search_captions__isnull=False
+    ).exclude(search_captions='')
+
+    for photo_id, search_captions in captions_with_search_data.values_list(
+        'photo_id', 'search_captions'
+    ).iterator(chunk_size=2000):
+        entry = search_data.setdefault(photo_id, {'search_location': ''})
+        entry['search_captions'] = search_captions
+
+    # Single upsert for everything collected above
+    PhotoSearch.objects.using(db_alias).bulk_create(
+        [
             PhotoSearch(
-                photo=photo,
-                search_location=photo.search_location,
-                search_captions=''  # Will be populated later
+                photo_id=photo_id,
+                search_location=data['search_location'],
+                search_captions=data.get('search_captions', ''),
             )
-        )
-    
-    # Bulk create PhotoSearch instances
-    PhotoSearch.objects.using(db_alias).bulk_create(search_instances_to_create, ignore_conflicts=True)
-    
-    # Now migrate search_captions from PhotoCaption to PhotoSearch
-    for caption in PhotoCaption.objects.using(db_alias).filter(search_captions__isnull=False).exclude(search_captions=''):
-        search_instance, created = PhotoSearch.objects.using(db_alias).get_or_create(
-            photo=caption.photo,
-            defaults={'search_captions': caption.search_captions, 'search_location': ''}
-        )
-        if not created:
-            search_instance.search_captions = caption.search_captions
-            search_instance.save()
+            for photo_id, data in search_data.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        update_fields=['search_captions', 'search_location'],
+        unique_fields=['photo'],
+    )
 
 
 def reverse_migrate_search_data(apps, schema_editor):
@@ -47,22 +61,63 @@ def reverse_migrate_search_data(apps, schema_editor):
     Photo = apps.get_model('api', 'Photo')
     PhotoCaption = apps.get_model('api', 'PhotoCaption')
     PhotoSearch = apps.get_model('api', 'PhotoSearch')
-    
+
     db_alias = schema_editor.connection.alias
-    
-    # Update photos with search_location from PhotoSearch instances
-    for search in PhotoSearch.objects.using(db_alias).all():
-        try:
-            photo = Photo.objects.using(db_alias).get(image_hash=search.photo_id)
-            photo.search_location = search.search_location
-            photo.save(update_fields=['search_location'])
-            
-            # Update PhotoCaption with search_captions
-            caption, created = PhotoCaption.objects.using(db_alias).get_or_create(photo=photo)
-            caption.search_captions = search.search_captions
-            caption.save(update_fields=['search_captions'])
-        except Photo.DoesNotExist:
-            continue
+    vendor = schema_editor.connection.vendor
+
+    # Two server-side statements instead of four queries per PhotoSearch row.
+    # The join drops rows whose photo no longer exists, matching the
+    # DoesNotExist skip in the ORM fallback below.
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE api_photo SET search_location = s.search_location "
+            "FROM api_photo_search s WHERE api_photo.image_hash = s.photo_id"
+        )
+        schema_editor.execute(
+            "INSERT INTO api_photo_caption "
+            "(photo_id, search_captions, created_at, updated_at) "
+            "SELECT s.photo_id, s.search_captions, NOW(), NOW() "
+            "FROM api_photo_search s "
+            "JOIN api_photo p ON p.image_hash = s.photo_id "
+            "ON CONFLICT (photo_id) "
+            "DO UPDATE SET search_captions = EXCLUDED.search_captions"
+        )
+        return
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "UPDATE api_photo SET search_location = ("
+            "SELECT s.search_location FROM api_photo_search s "
+            "WHERE s.photo_id = api_photo.image_hash"
+            ") WHERE image_hash IN (SELECT photo_id FROM api_photo_search)"
+        )
+        schema_editor.execute(
+            "INSERT INTO api_photo_caption "
+            "(photo_id, search_captions, created_at, updated_at) "
+            "SELECT s.photo_id, s.search_captions, datetime('now'), datetime('now') "
+            "FROM api_photo_search s "
+            "JOIN api_photo p ON p.image_hash = s.photo_id "
+            "WHERE true "
+            "ON CONFLICT (photo_id) "
+            "DO UPDATE SET search_captions = excluded.search_captions"
+        )
+        return
+
+    # Update photos with search_location from PhotoSearch instances,
+    # streamed so the whole table is never held in memory at once and
+    # wrapped in one transaction instead of one autocommit per save
+    with transaction.atomic(using=db_alias):
+        for search in PhotoSearch.objects.using(db_alias).iterator(chunk_size=2000):
+            try:
+                photo = Photo.objects.using(db_alias).get(image_hash=search.photo_id)
+                photo.search_location = search.search_location
+                photo.save(update_fields=['search_location'])
+
+                # Update PhotoCaption with search_captions
+                caption, created = PhotoCaption.objects.using(db_alias).get_or_create(photo=photo)
+                caption.search_captions = search.search_captions
+                caption.save(update_fields=['search_captions'])
+            except Photo.DoesNotExist:
+                continue
 
 
 class Migration(migrations.Migration):
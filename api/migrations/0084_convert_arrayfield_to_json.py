@@ -1,5 +1,5 @@
 # Migration to safely convert ArrayField to JSONField for SQLite compatibility
-from django.db import migrations, models
+from django.db import migrations, models, transaction
 
 
 def copy_arrayfield_to_json(apps, schema_editor):
@@ -7,25 +7,54 @@ def copy_arrayfield_to_json(apps, schema_editor):
     Copy data from ArrayField to JSONField format.
     This handles the conversion for both PostgreSQL and SQLite.
     """
+    # On PostgreSQL one server-side UPDATE converts every row without
+    # shuttling 512-float embeddings through Python.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE api_photo SET clip_embeddings_json = to_jsonb(clip_embeddings) "
+            "WHERE clip_embeddings IS NOT NULL"
+        )
+        return
+
+    # ArrayField only ever held data on PostgreSQL, but keep an ORM path for
+    # other backends just in case.
     Photo = apps.get_model('api', 'Photo')
-    
-    for photo in Photo.objects.all():
-        if photo.clip_embeddings is not None:
-            # ArrayField data is already in list format, just copy it
-            photo.clip_embeddings_json = photo.clip_embeddings
-            photo.save(update_fields=['clip_embeddings_json'])
+
+    # Stream with a server-side cursor and fetch only the embedding columns:
+    # each row carries a 512-float vector, so caching the full queryset in
+    # memory is not an option on large libraries.
+    with transaction.atomic(using=schema_editor.connection.alias):
+        for photo in Photo.objects.only('image_hash', 'clip_embeddings').iterator(
+            chunk_size=2000
+        ):
+            if photo.clip_embeddings is not None:
+                # ArrayField data is already in list format, just copy it
+                photo.clip_embeddings_json = photo.clip_embeddings
+                photo.save(update_fields=['clip_embeddings_json'])
 
 
 def copy_json_to_arrayfield(apps, schema_editor):
     """
     Reverse migration: copy JSONField data back to ArrayField format.
     """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE api_photo SET clip_embeddings = ARRAY("
+            "SELECT elem::double precision "
+            "FROM jsonb_array_elements_text(clip_embeddings_json) AS elem"
+            ") WHERE clip_embeddings_json IS NOT NULL"
+        )
+        return
+
     Photo = apps.get_model('api', 'Photo')
-    
-    for photo in Photo.objects.all():
-        if photo.clip_embeddings_json is not None:
-            photo.clip_embeddings = photo.clip_embeddings_json
-            photo.save(update_fields=['clip_embeddings'])
+
+    with transaction.atomic(using=schema_editor.connection.alias):
+        for photo in Photo.objects.only(
+            'image_hash', 'clip_embeddings_json'
+        ).iterator(chunk_size=2000):
+            if photo.clip_embeddings_json is not None:
+                photo.clip_embeddings = photo.clip_embeddings_json
+                photo.save(update_fields=['clip_embeddings'])
 
 
 class Migration(migrations.Migration):
@@ -18,10 +18,10 @@ def rename_thumbnails_uuid_to_hash(apps, schema_editor):
     
     BATCH_SIZE = 1000  # Process thumbnails in batches of 1000
     
-    # Get total count for progress reporting
-    total_count = Thumbnail.objects.count()
-    print(f"Starting thumbnail migration for {total_count} photos...")
-    
+    # No upfront count: COUNT(*) is a full index scan on big tables and the
+    # total is only cosmetic for the progress lines below
+    print("Starting thumbnail migration (streaming)...")
+
     renamed_count = 0
     skipped_count = 0
     processed_count = 0
@@ -86,7 +86,7 @@ def rename_thumbnails_uuid_to_hash(apps, schema_editor):
                 ['thumbnail_big', 'square_thumbnail', 'square_thumbnail_small'],
                 batch_size=BATCH_SIZE
             )
-            print(f"Progress: {processed_count}/{total_count} processed, {renamed_count} renamed, {skipped_count} skipped")
+            print(f"Progress: {processed_count} processed, {renamed_count} renamed, {skipped_count} skipped")
             thumbnails_to_update = []
     
     # Update any remaining thumbnails in the final batch
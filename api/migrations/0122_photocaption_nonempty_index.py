@@ -0,0 +1,20 @@
+from django.db import migrations, models
+from django.db.models import Q
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0121_add_default_tagging_model"),
+        ("api", "0121_user_save_face_tags_to_disk"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="photocaption",
+            index=models.Index(
+                condition=~Q(captions_json={}) & Q(captions_json__isnull=False),
+                fields=["photo"],
+                name="photocaption_nonempty",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0122_photocaption_nonempty_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FileHashCache",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("path", models.TextField(unique=True)),
+                ("mtime_ns", models.BigIntegerField()),
+                ("size", models.BigIntegerField()),
+                ("digest", models.CharField(max_length=32)),
+            ],
+        ),
+    ]
@@ -1,15 +1,24 @@
+import hashlib
 import math
 import os
 import tarfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import requests
 from constance import config as site_config
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 from api import util
 from api.models.long_running_job import LongRunningJob
 
+# Shared session so parallel downloads reuse connections to the same host
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
 
 class MlTypes:
     CAPTIONING = "captioning"
@@ -155,7 +164,21 @@ def download_model(model):
     target_dir = model_folder / model["target-dir"]
 
     if target_dir.exists():
-        util.logger.info(f"Model {model['name']} already downloaded")
+        # For single-file models, existence is not enough: a crashed run
+        # leaves a partial file behind. Compare against the remote size and
+        # resume (Range request inside _download_file) when it is short.
+        complete = True
+        if model["unpack-command"] is None and target_dir.is_file():
+            expected = _remote_size(model["url"])
+            if expected is not None and target_dir.stat().st_size != expected:
+                complete = False
+        if complete:
+            util.logger.info(f"Model {model['name']} already downloaded")
+        else:
+            util.logger.info(f"Model {model['name']} incomplete, resuming download")
+            _download_file(
+                model["url"], target_dir, model["name"], sha256=model.get("sha256")
+            )
         # Check if all additional files exist for models like Moondream
         if model.get("additional_files"):
             for additional_file in model["additional_files"]:
@@ -168,26 +191,27 @@ def download_model(model):
                         additional_file["url"],
                         additional_target,
                         f"{model['name']} ({additional_file['target']})",
+                        sha256=additional_file.get("sha256"),
                     )
         return
 
+    # Tarballs are unpacked straight off the HTTP stream: no multi-GB
+    # intermediate file on disk and no second read pass for extraction
     if model["unpack-command"] == "tar -zxC":
-        target_dir = model_folder / (model["target-dir"] + ".tar.gz")
-    if model["unpack-command"] == "tar -xvf":
-        target_dir = model_folder / (model["target-dir"] + ".tar")
-    if model["unpack-command"] is None:
-        target_dir = model_folder / model["target-dir"]
-
-    _download_file(model["url"], target_dir, model["name"])
-
-    if model["unpack-command"] == "tar -zxC":
-        with tarfile.open(target_dir, mode="r:gz") as tar:
-            tar.extractall(path=model_folder)
-        os.remove(target_dir)
-    if model["unpack-command"] == "tar -xvf":
-        with tarfile.open(target_dir, mode="r:") as tar:
-            tar.extractall(path=model_folder)
-        os.remove(target_dir)
+        _stream_unpack(
+            model["url"], model_folder, "r|gz", model["name"], model.get("sha256")
+        )
+    elif model["unpack-command"] == "tar -xvf":
+        _stream_unpack(
+            model["url"], model_folder, "r|", model["name"], model.get("sha256")
+        )
+    else:
+        _download_file(
+            model["url"],
+            model_folder / model["target-dir"],
+            model["name"],
+            sha256=model.get("sha256"),
+        )
 
     # Download additional files if they exist (e.g., mmproj for Moondream)
     if model.get("additional_files"):
@@ -198,20 +222,109 @@ def download_model(model):
                     additional_file["url"],
                     additional_target,
                     f"{model['name']} ({additional_file['target']})",
+                    sha256=additional_file.get("sha256"),
                 )
 
 
-def _download_file(url, target_path, model_name):
-    """Helper function to download a single file with progress tracking"""
+# One HEAD per URL per process; download_model may ask for the same size
+# several times in a run
+_HEAD_CACHE = {}
+
+
+def _remote_size(url):
+    """Return the Content-Length reported for ``url``, or None if unknown."""
+    if url not in _HEAD_CACHE:
+        try:
+            head = _SESSION.head(url, allow_redirects=True)
+            _HEAD_CACHE[url] = int(head.headers.get("content-length", 0)) or None
+        except (requests.RequestException, ValueError):
+            _HEAD_CACHE[url] = None
+    return _HEAD_CACHE[url]
+
+
+class _HashingReader:
+    """File-like wrapper that feeds everything read through a sha256 hasher."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        block = self._raw.read(size)
+        if block:
+            self.digest.update(block)
+        return block
+
+
+def _stream_unpack(url, model_folder, mode, model_name, sha256=None):
+    """Stream a tarball from ``url`` and extract it on the fly."""
+    util.logger.info(f"Streaming and unpacking {model_name}")
+    response = _SESSION.get(url, stream=True, allow_redirects=True)
+    response.raw.decode_content = True
+    reader = _HashingReader(response.raw)
+    with tarfile.open(fileobj=reader, mode=mode) as tar:
+        tar.extractall(path=model_folder)
+    if sha256 and reader.digest.hexdigest() != sha256:
+        raise OSError(f"Checksum mismatch for {model_name} after extraction")
+
+
+def _file_sha256(path):
+    """Hash an existing file in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as existing_file:
+        for block in iter(lambda: existing_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _download_file(url, target_path, model_name, sha256=None):
+    """Helper function to download a single file with progress tracking.
+
+    If the file already exists it is verified against ``sha256`` (when
+    provided) and kept as-is on a match; otherwise the download resumes
+    from the current size with an HTTP Range request.
+    """
     target_path = Path(target_path)
     target_path.parent.mkdir(parents=True, exist_ok=True)
-    response = requests.get(url, stream=True, allow_redirects=True)
-    total_size = int(response.headers.get("content-length", 0))
-    block_size = 1024
-    current_progress = 0
+
+    resume_from = 0
+    if target_path.exists():
+        if sha256 and _file_sha256(target_path) == sha256:
+            util.logger.info(f"Model file {model_name} already valid, skipping")
+            return
+        resume_from = target_path.stat().st_size
+
+    headers = {}
+    if resume_from:
+        headers["Range"] = f"bytes={resume_from}-"
+    response = _SESSION.get(url, stream=True, allow_redirects=True, headers=headers)
+
+    if resume_from and response.status_code == 416:
+        # Range not satisfiable: the file on disk already spans the remote
+        # size, i.e. the previous download finished. Verify when we can,
+        # restarting from scratch on a bad checksum.
+        if sha256 and _file_sha256(target_path) != sha256:
+            os.remove(target_path)
+            _download_file(url, target_path, model_name, sha256=sha256)
+            return
+        util.logger.info(f"Model file {model_name} already complete, skipping")
+        return
+    # Bail out before open(..., "wb") truncates the target - otherwise an
+    # HTTP error body would overwrite a possibly complete model file
+    response.raise_for_status()
+
+    # Servers that honor the Range request answer 206; everything else sends
+    # the whole file again, so start over
+    resuming = resume_from and response.status_code == 206
+    if resume_from and not resuming:
+        resume_from = 0
+    current_progress = resume_from
+    total_size = resume_from + int(response.headers.get("content-length", 0))
+    # 1 MiB blocks: far fewer write syscalls than the old 1 KiB chunks
+    block_size = 1 << 20
     previous_percentage = -1
 
-    with open(target_path, "wb") as target_file:
+    with open(target_path, "ab" if resuming else "wb") as target_file:
         for chunk in response.iter_content(chunk_size=block_size):
             if chunk:
                 target_file.write(chunk)
@@ -231,6 +344,10 @@ def _download_file(url, target_path, model_name):
             f"Downloaded {model_name}: {current_progress} bytes (size unknown during transfer)"
         )
 
+    if sha256 and _file_sha256(target_path) != sha256:
+        os.remove(target_path)
+        raise OSError(f"Checksum mismatch for {model_name}, download discarded")
+
 
 def download_models(user):
     lrj = LongRunningJob.create_job(
@@ -243,29 +360,47 @@ def download_models(user):
     model_folder = Path(settings.MEDIA_ROOT) / "data_models"
     model_folder.mkdir(parents=True, exist_ok=True)
 
-    for idx, model in enumerate(ML_MODELS):
-        download_model(model)
-        lrj.update_progress(current=idx + 1)
+    # Independent models download in parallel so network and disk overlap
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(download_model, model) for model in ML_MODELS]
+        for done, future in enumerate(as_completed(futures), start=1):
+            future.result()
+            lrj.update_progress(current=done)
 
     lrj.complete()
 
 
 def do_all_models_exist():
     model_folder = Path(settings.MEDIA_ROOT) / "data_models"
+
+    # One scandir per directory instead of one stat per expected file -
+    # matters on cold caches and network-mounted MEDIA_ROOT
+    dir_cache = {}
+
+    def _listing(directory):
+        if directory not in dir_cache:
+            try:
+                dir_cache[directory] = {entry.name for entry in os.scandir(directory)}
+            except FileNotFoundError:
+                dir_cache[directory] = set()
+        return dir_cache[directory]
+
+    def _exists(relative_target):
+        path = model_folder / relative_target
+        return path.name in _listing(path.parent)
+
     for model in ML_MODELS:
         if model["type"] in (MlTypes.LLM, MlTypes.MOONDREAM, MlTypes.TAGGING):
             if not model and model != "none":
                 continue
 
         # Check main model file
-        target_dir = model_folder / model["target-dir"]
-        if not target_dir.exists():
+        if not _exists(model["target-dir"]):
             return False
 
         # Check additional files if they exist (like mmproj for Moondream)
         if model.get("additional_files"):
             for additional_file in model["additional_files"]:
-                additional_target = model_folder / additional_file["target"]
-                if not additional_target.exists():
+                if not _exists(additional_file["target"]):
                     return False
     return True
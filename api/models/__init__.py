@@ -6,7 +6,7 @@ from api.models.album_user import AlbumUser
 from api.models.cluster import Cluster
 from api.models.duplicate import Duplicate
 from api.models.face import Face
-from api.models.file import File
+from api.models.file import File, FileHashCache
 from api.models.long_running_job import LongRunningJob
 from api.models.person import Person
 from api.models.photo import Photo
@@ -40,4 +40,5 @@ __all__ = [
     "Thumbnail",
     "User",
     "File",
+    "FileHashCache",
 ]
@@ -1,5 +1,5 @@
 import uuid
-from django.db import models
+from django.db import IntegrityError, models
 from django.utils import timezone
 
 from api.models.album_user import AlbumUser
@@ -23,18 +23,11 @@ class AlbumUserShare(models.Model):
     share_faces = models.BooleanField(null=True, blank=True, default=None)
 
     def ensure_slug(self) -> None:
+        # No uniqueness probing: with 16 hex chars of randomness a collision
+        # is astronomically unlikely, so we let the unique index catch it and
+        # retry in save() instead of paying an extra query on every save.
         if self.enabled and not self.slug:
-            base = uuid.uuid4().hex[:12]
-            candidate = base
-            idx = 0
-            while (
-                AlbumUserShare.objects.filter(slug=candidate)
-                .exclude(id=self.id)
-                .exists()
-            ):
-                idx += 1
-                candidate = f"{base}-{idx}"
-            self.slug = candidate
+            self.slug = uuid.uuid4().hex[:16]
 
     def is_active(self) -> bool:
         if not self.enabled:
@@ -44,9 +37,24 @@ class AlbumUserShare(models.Model):
         return self.expires_at >= timezone.now()
 
     def save(self, *args, **kwargs):
-        if self.enabled and not self.slug:
+        generated_slug = self.enabled and not self.slug
+        if generated_slug:
             self.ensure_slug()
-        super().save(*args, **kwargs)
+
+        if not generated_slug:
+            super().save(*args, **kwargs)
+            return
+
+        # The slug came from uuid4, so an IntegrityError here almost
+        # certainly means a slug collision - regenerate and retry a few times
+        for attempt in range(3):
+            try:
+                super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if attempt == 2:
+                    raise
+                self.slug = uuid.uuid4().hex[:16]
 
     def get_effective_sharing_settings(self) -> dict:
         """Resolve effective sharing settings.
@@ -23,14 +23,22 @@ from django.utils import timezone
 from api.models.user import User, get_deleted_user
 
 
+class DuplicateQuerySet(models.QuerySet):
+    def with_photo_counts(self):
+        """Annotate each group with its photo count in the listing query."""
+        return self.annotate(_photo_count=models.Count("photos"))
+
+
 class Duplicate(models.Model):
     """
     Represents a group of duplicate photos that should be reviewed.
-    
+
     Photos in a duplicate group are candidates for deletion - the user
     reviews them and decides which to keep.
     """
 
+    objects = DuplicateQuerySet.as_manager()
+
     class DuplicateType(models.TextChoices):
         # Exact byte-for-byte copies (same MD5 hash, different file paths)
         EXACT_COPY = "exact_copy", "Exact Copies"
@@ -107,7 +115,14 @@ class Duplicate(models.Model):
 
     @property
     def photo_count(self):
-        """Number of photos in this duplicate group."""
+        """Number of photos in this duplicate group.
+
+        Uses the with_photo_counts() annotation when present, so listings
+        avoid one COUNT(*) per group.
+        """
+        annotated = getattr(self, "_photo_count", None)
+        if annotated is not None:
+            return annotated
         return self.photos.count()
 
     def get_photos_ordered_by_quality(self):
@@ -140,11 +155,17 @@ class Duplicate(models.Model):
             # For exact copies, pick the one with shortest path (likely "original")
             best = photos.order_by(Length("main_file__path")).first()
         else:
-            # For visual duplicates: highest resolution
+            # For visual duplicates: highest resolution, largest file as
+            # tiebreaker. Explicit descending order with first() maps to
+            # ORDER BY ... DESC LIMIT 1 instead of relying on last() to
+            # reverse an expression ordering.
             from django.db.models import F
-            best = photos.order_by(
-                F("metadata__width") * F("metadata__height")
-            ).last()
+
+            best = (
+                photos.annotate(px=F("metadata__width") * F("metadata__height"))
+                .order_by("-px", "-size")
+                .first()
+            )
 
         return best
 
@@ -194,11 +215,10 @@ class Duplicate(models.Model):
         """Mark as 'not actually duplicates' and unlink photos from group."""
         self.review_status = self.ReviewStatus.DISMISSED
         self.reviewed_at = timezone.now()
-        
-        # Unlink photos from duplicate group (ManyToMany)
-        for photo in self.photos.all():
-            photo.duplicates.remove(self)
-        
+
+        # Unlink all photos from the group with one through-table DELETE
+        self.photos.clear()
+
         self.save()
         return self
 
@@ -230,10 +250,11 @@ class Duplicate(models.Model):
         if other_duplicate.pk == self.pk:
             return
 
-        # Move all photos from other duplicate to this one (ManyToMany)
-        for photo in other_duplicate.photos.all():
-            photo.duplicates.add(self)
-            photo.duplicates.remove(other_duplicate)
+        # Move all photos from other duplicate to this one (ManyToMany):
+        # one bulk INSERT plus one through-table DELETE instead of two
+        # statements per photo
+        self.photos.add(*other_duplicate.photos.all())
+        other_duplicate.photos.clear()
 
         self.calculate_potential_savings()
 
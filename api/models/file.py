@@ -1,5 +1,7 @@
 import hashlib
+import mmap
 import os
+import threading
 
 import magic
 from PIL import Image
@@ -9,9 +11,10 @@ from django.db import models
 
 from api import util
 
-# Most optimal value for performance/memory. Found here:
-# https://stackoverflow.com/questions/17731660/hashlib-optimal-size-of-chunks-to-be-used-in-md5-update
-BUFFER_SIZE = 65536
+# Block size for feeding a memory-mapped file into the hasher. 4 MiB keeps
+# the kernel readahead engine busy on spinning disks; on SSDs larger blocks
+# are neutral.
+HASH_BLOCK_SIZE = 4 << 20
 
 
 # To-Do: add owner to file
@@ -40,7 +43,7 @@ class File(models.Model):
     embedded_media = models.ManyToManyField("self", symmetrical=False)
 
     def __str__(self):
-        return self.path + " " + self._find_out_type()
+        return self.path + " " + self.get_type_display()
 
     @staticmethod
     def create(path: str, user):
@@ -76,7 +79,7 @@ class File(models.Model):
         file = File()
         file.path = path
         file.hash = calculate_hash(user, path)
-        file._find_out_type()
+        file.type = File._detect_type(path)
 
         try:
             file.save()
@@ -94,30 +97,68 @@ class File(models.Model):
             # Re-raise if we can't find the conflicting record
             raise
 
-    def _find_out_type(self):
-        self.type = File.IMAGE
-        if is_raw(self.path):
-            self.type = File.RAW_FILE
-        if is_video(self.path):
-            self.type = File.VIDEO
-        if is_metadata(self.path):
-            self.type = File.METADATA_FILE
-        self.save()
+    @staticmethod
+    def _detect_type(path) -> int:
+        # One splitext and a set lookup settles the common cases; libmagic
+        # (an extra open plus byte inspection per file) only runs for
+        # extensions we do not recognize. Pure function: the caller decides
+        # when to save, so detection costs no extra write.
+        ext = os.path.splitext(path)[1].upper()
+        if ext in RAW_EXTENSIONS:
+            return File.RAW_FILE
+        if ext in METADATA_EXTENSIONS:
+            return File.METADATA_FILE
+        if ext in IMAGE_EXTENSIONS:
+            return File.IMAGE
+        if ext in VIDEO_EXTENSIONS:
+            return File.VIDEO
+        return File.VIDEO if is_video(path) else File.IMAGE
+
+
+class FileHashCache(models.Model):
+    """
+    Memo of (path, mtime_ns, size) -> content digest.
+
+    Rescans consult this before re-reading file contents: when a file's
+    mtime and size are unchanged since the digest was computed, the cached
+    digest is reused and the full content read is skipped. Rows are
+    overwritten in place when the file on disk changes.
+    """
+
+    path = models.TextField(unique=True)
+    mtime_ns = models.BigIntegerField()
+    size = models.BigIntegerField()
+    digest = models.CharField(max_length=32)
+
+    def __str__(self):
+        return self.path
+
+
+# One libmagic cookie per thread: constructing Magic() reparses the pattern
+# database every time, and cookies are not safe to share between the scan
+# pool's threads
+_magic_local = threading.local()
+
+
+def _get_mime_magic():
+    if not hasattr(_magic_local, "mime"):
+        _magic_local.mime = magic.Magic(mime=True)
+    return _magic_local.mime
 
 
 def is_video(path):
     try:
-        mime = magic.Magic(mime=True)
-        filename = mime.from_file(path)
+        filename = _get_mime_magic().from_file(path)
         return filename.find("video") != -1
     except Exception:
         util.logger.error(f"Error while checking if file is video: {path}")
         return False
 
 
-def is_raw(path):
-    fileextension = os.path.splitext(path)[1]
-    rawformats = [
+# Extension tables built once at import so the per-file checks in the scan
+# walk are a single splitext plus set lookup
+RAW_EXTENSIONS = frozenset(
+    {
         ".RWZ",
         ".CR2",
         ".NRW",
@@ -155,28 +196,67 @@ def is_raw(path):
         ".PEF",
         ".CXI",
         ".MDC",
-    ]
-    return fileextension.upper() in rawformats
+    }
+)
+
+METADATA_EXTENSIONS = frozenset({".XMP"})
+
+IMAGE_EXTENSIONS = frozenset(
+    {
+        ".JPG",
+        ".JPEG",
+        ".PNG",
+        ".GIF",
+        ".WEBP",
+        ".TIFF",
+        ".TIF",
+        ".BMP",
+        ".HEIC",
+        ".HEIF",
+    }
+)
+
+VIDEO_EXTENSIONS = frozenset(
+    {
+        ".MP4",
+        ".MOV",
+        ".MKV",
+        ".AVI",
+        ".WEBM",
+        ".M4V",
+        ".3GP",
+        ".MPG",
+        ".MPEG",
+        ".WMV",
+        ".MTS",
+        ".M2TS",
+    }
+)
+
+
+def is_raw(path):
+    return os.path.splitext(path)[1].upper() in RAW_EXTENSIONS
 
 
 def is_metadata(path):
-    fileextension = os.path.splitext(path)[1]
-    rawformats = [
-        ".XMP",
-    ]
-    return fileextension.upper() in rawformats
+    return os.path.splitext(path)[1].upper() in METADATA_EXTENSIONS
 
 
 def is_valid_media(path, user) -> bool:
     ext = os.path.splitext(path)[1].upper()
-    heif_exts = [".HEIC", ".HEIF"]
-    
-    if is_video(path=path) or is_metadata(path=path):
+
+    # Known extensions settle validity without opening the file; libmagic
+    # (is_video) only probes paths the extension tables cannot place, so the
+    # scan does not pay a byte-inspection here and again in type detection
+    if ext in VIDEO_EXTENSIONS or ext in METADATA_EXTENSIONS:
         util.logger.info(f"Valid non-image media: {path}")
         return True
-    if is_raw(path=path):
+    if ext in RAW_EXTENSIONS:
         return True
-    
+    if ext not in IMAGE_EXTENSIONS and is_video(path=path):
+        util.logger.info(f"Valid non-image media: {path}")
+        return True
+
     # Validation using Pillow (replacing PyVips)
     try:
         with Image.open(path) as img:
@@ -189,19 +269,66 @@ def is_valid_media(path, user) -> bool:
 
 def calculate_hash(user, path):
     try:
-        hash_md5 = hashlib.md5()
+        stat_result = os.stat(path)
+    except OSError as e:
+        util.logger.error(f"Could not calculate hash for file {path}")
+        raise e
+
+    digest = (
+        FileHashCache.objects.filter(
+            path=path,
+            mtime_ns=stat_result.st_mtime_ns,
+            size=stat_result.st_size,
+        )
+        .values_list("digest", flat=True)
+        .first()
+    )
+    if digest is None:
+        digest = _hash_file_contents(path)
+        FileHashCache.objects.update_or_create(
+            path=path,
+            defaults={
+                "mtime_ns": stat_result.st_mtime_ns,
+                "size": stat_result.st_size,
+                "digest": digest,
+            },
+        )
+    return digest + str(user.id)
+
+
+def _hash_file_contents(path):
+    # md5 stays the digest: hashes are persisted primary keys (and thumbnail
+    # filenames derive from them), so switching algorithms would orphan every
+    # existing File row. usedforsecurity=False flags the non-cryptographic
+    # use and keeps hashing working on FIPS-restricted builds.
+    try:
+        hash_md5 = hashlib.md5(usedforsecurity=False)
         with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(BUFFER_SIZE), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest() + str(user.id)
+            try:
+                # Tell the kernel we read front to back so it doubles the
+                # readahead window; not every filesystem supports the hint
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except (AttributeError, OSError):
+                pass
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for offset in range(0, len(mm), HASH_BLOCK_SIZE):
+                        hash_md5.update(mm[offset : offset + HASH_BLOCK_SIZE])
+            except (ValueError, OSError):
+                # Empty files and some filesystems cannot be mapped; let
+                # hashlib drive the read/update loop instead of a Python
+                # chunk loop
+                hash_md5 = hashlib.file_digest(
+                    f, lambda: hashlib.md5(usedforsecurity=False)
+                )
+        return hash_md5.hexdigest()
     except Exception as e:
         util.logger.error(f"Could not calculate hash for file {path}")
         raise e
 
 
 def calculate_hash_b64(user, content):
-    hash_md5 = hashlib.md5()
+    # file_digest hashes BytesIO buffers zero-copy via getbuffer()
     with content as f:
-        for chunk in iter(lambda: f.read(BUFFER_SIZE), b""):
-            hash_md5.update(chunk)
+        hash_md5 = hashlib.file_digest(f, lambda: hashlib.md5(usedforsecurity=False))
     return hash_md5.hexdigest() + str(user.id)
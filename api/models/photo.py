@@ -335,7 +335,7 @@ class Photo(models.Model):
             self.save()
         album_date.save()
 
-    def _geolocate(self, commit=True):
+    def _geolocate(self, commit=True, geocode_cache=None):
         old_gps_lat = self.exif_gps_lat
         old_gps_lon = self.exif_gps_lon
         new_gps_lat, new_gps_lon = get_metadata(
@@ -361,7 +361,15 @@ class Photo(models.Model):
         if commit:
             self.save()
         try:
-            res = reverse_geocode(new_gps_lat, new_gps_lon)
+            # Photos shot at (nearly) the same spot resolve to the same place;
+            # ~11m of precision is plenty to share one lookup between them.
+            cache_key = (round(float(new_gps_lat), 4), round(float(new_gps_lon), 4))
+            if geocode_cache is not None and cache_key in geocode_cache:
+                res = geocode_cache[cache_key]
+            else:
+                res = reverse_geocode(new_gps_lat, new_gps_lon)
+                if geocode_cache is not None:
+                    geocode_cache[cache_key] = res
             if not res:
                 return
         except Exception as e:
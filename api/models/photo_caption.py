@@ -186,6 +186,15 @@ class PhotoCaption(models.Model):
 
     class Meta:
         db_table = "api_photo_caption"
+        indexes = [
+            # Partial index backing the "has non-empty captions" filters used
+            # when sampling captioned photos.
+            models.Index(
+                fields=["photo"],
+                condition=~Q(captions_json={}) & Q(captions_json__isnull=False),
+                name="photocaption_nonempty",
+            )
+        ]
 
     def __str__(self):
         return f"Captions for {self.photo.image_hash}"
@@ -158,10 +158,15 @@ class PhotoStack(models.Model):
             best = still_photos.first() if still_photos.exists() else photos.first()
         else:
             # MANUAL and default: highest resolution
-            # Use metadata__width and metadata__height since these fields moved to PhotoMetadata
-            best = photos.order_by(
-                models.F("metadata__width") * models.F("metadata__height")
-            ).last()
+            # Use metadata__width and metadata__height since these fields moved to PhotoMetadata.
+            # Descending order with first() is a plain ORDER BY ... DESC LIMIT 1.
+            best = (
+                photos.annotate(
+                    px=models.F("metadata__width") * models.F("metadata__height")
+                )
+                .order_by("-px", "-size")
+                .first()
+            )
 
         if best:
             self.primary_photo = best
@@ -1,12 +1,15 @@
 import os
 import uuid
 
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django_q.tasks import Chain
 
+from api.api_util import get_search_term_examples_cache_key
 from api.directory_watcher import scan_photos
 from api.ml_models import do_all_models_exist, download_models
+from api.models import Photo
 from api.models.user import User
 
 
@@ -23,4 +26,10 @@ def auto_scan_new_user_directory(sender, instance, created, **kwargs):
         chain.append(download_models, instance)
 
     chain.append(scan_photos, instance, False, uuid.uuid4(), instance.scan_directory)
-    chain.run()
\ No newline at end of file
+    chain.run()
+
+
+@receiver(post_save, sender=Photo)
+@receiver(post_delete, sender=Photo)
+def invalidate_search_term_examples_cache(sender, instance, **kwargs):
+    cache.delete(get_search_term_examples_cache_key(instance.owner_id))
\ No newline at end of file
@@ -10,6 +10,15 @@ class _FakeQuerySet(list):
     def count(self):
         return len(self)
 
+    def iterator(self, chunk_size=None):
+        return iter(self)
+
+    def select_related(self, *fields):
+        return self
+
+    def only(self, *fields):
+        return self
+
 
 class GeolocateLoggingTests(unittest.TestCase):
     def test_geolocate_logs_exception_without_crash(self):
@@ -20,6 +29,10 @@ class GeolocateLoggingTests(unittest.TestCase):
         fake_models_module = ModuleType("api.models")
         fake_models_module.Photo = MagicMock()
 
+        fake_album_thing_module = ModuleType("api.models.album_thing")
+        fake_album_thing_module.AlbumThing = MagicMock()
+        fake_album_thing_module.get_album_thing = MagicMock()
+
         fake_photo_caption_module = ModuleType("api.models.photo_caption")
         fake_photo_caption_module.PhotoCaption = MagicMock()
 
@@ -33,6 +46,11 @@ class GeolocateLoggingTests(unittest.TestCase):
 
         fake_django_db_module = ModuleType("django.db")
         fake_django_db_module.models = SimpleNamespace(Q=MagicMock())
+        fake_django_db_module.close_old_connections = lambda: None
+
+        fake_django_utils_module = ModuleType("django.utils")
+        fake_django_utils_module.timezone = SimpleNamespace(now=MagicMock())
+        fake_django_module.utils = fake_django_utils_module
 
         fake_tqdm_module = ModuleType("tqdm")
         fake_tqdm_module.tqdm = MagicMock()
@@ -46,11 +64,13 @@ class GeolocateLoggingTests(unittest.TestCase):
             {
                 "api": fake_api_module,
                 "api.models": fake_models_module,
+                "api.models.album_thing": fake_album_thing_module,
                 "api.models.photo_caption": fake_photo_caption_module,
                 "api.util": fake_util_module,
                 "django": fake_django_module,
                 "django.apps": fake_django_apps,
                 "django.db": fake_django_db_module,
+                "django.utils": fake_django_utils_module,
                 "tqdm": fake_tqdm_module,
             },
         ):
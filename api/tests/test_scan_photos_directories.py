@@ -43,7 +43,7 @@ class ScanPhotosDirectoryCreationTest(TestCase):
 
             with override_settings(MEDIA_ROOT=media_root):
                 with (
-                    patch("api.directory_watcher.scan_jobs.walk_directory"),
+                    patch("api.directory_watcher.scan_jobs.iter_files"),
                     patch("api.directory_watcher.scan_jobs.walk_files"),
                     patch("api.directory_watcher.scan_jobs.photo_scanner"),
                     patch("api.directory_watcher.scan_jobs.AsyncTask", DummyAsyncTask),
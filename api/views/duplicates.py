@@ -311,10 +311,9 @@ class DuplicateDeleteView(APIView):
                 {"error": "Duplicate group not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        # Unlink photos from this duplicate group (ManyToMany)
+        # Unlink photos from this duplicate group with one through-table DELETE
         photo_count = duplicate.photos.count()
-        for photo in duplicate.photos.all():
-            photo.duplicates.remove(duplicate)
+        duplicate.photos.clear()
 
         # Delete duplicate group
         duplicate_id_str = str(duplicate.id)